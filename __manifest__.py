@@ -24,13 +24,21 @@
         'l10n_ar',
     ],
     'data': [
-        # 'security/ir.model.access.csv',
+        'security/ir.model.access.csv',
+        'security/ir_rule.xml',
+        'data/ir_cron_data.xml',
         'views/sale_order_views.xml',
         'views/purchase_order_views.xml',
         'views/account_move_views.xml',
+        'views/account_payment_views.xml',
+        'views/account_bank_statement_line_views.xml',
+        'views/currency_exposure_snapshot_views.xml',
         'reports/sale_order_report.xml',
         'reports/purchase_order_report.xml',
         'reports/account_move_report.xml',
+        'wizard/currency_exposure_views.xml',
+        'wizard/currency_rate_simulation_views.xml',
+        'wizard/currency_rate_compaction_views.xml',
     ],
     'installable': True,
     'application': False,
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+
+
+class CurrencyConversionController(http.Controller):
+
+    @http.route('/l10n_ar_custom_currency/convert', type='json', auth='user', methods=['POST'])
+    def convert(self, conversions=None, **kwargs):
+        """
+        Por qué: Endpoint único para integraciones (e-commerce, BI)
+        Patrón: Batch Endpoint - miles de conversiones en una sola llamada
+        Tip: Misma lógica de tasa efectiva que los documentos
+             (manual primero, luego sistema). Ejemplo de params:
+             {"conversions": [
+                 {"amount": 100.0, "currency": "USD", "company_id": 1, "date": "2026-01-31"},
+                 {"amount": 50.0, "document": {"model": "sale.order", "id": 42}}
+             ]}
+        """
+        if not isinstance(conversions, list):
+            return {'error': 'Se esperaba una lista en "conversions"'}
+        return {'results': request.env['res.currency']._convert_amounts_batch(conversions)}
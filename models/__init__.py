@@ -1,6 +1,13 @@
 # -*- coding: utf-8 -*-
+from . import manual_currency_rate_mixin
 from . import sale_order
 from . import sale_order_line
 from . import purchase_order
 from . import purchase_order_line
 from . import account_move
+from . import ir_actions_report
+from . import res_currency
+from . import res_currency_rate
+from . import account_payment
+from . import currency_exposure_snapshot
+from . import account_bank_statement_line
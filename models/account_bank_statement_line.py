@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class AccountBankStatementLine(models.Model):
+    _inherit = 'account.bank.statement.line'
+
+    # Por qué: Igual que en pagos, manual_currency_rate llega por _inherits
+    # desde account.move y la línea lo comparte con su asiento
+
+    def _prepare_move_line_default_vals(self, counterpart_account_id=None):
+        """
+        Por qué: Valuar el extracto en moneda extranjera con la tasa manual
+                 de las facturas que va a conciliar
+        Patrón: Template Method - post-procesar las líneas nativas
+        Tip: Misma lógica que account.payment: la contrapartida (suspenso)
+             absorbe el redondeo; al conciliar contra una factura con la
+             misma tasa no se crea asiento de diferencia de cambio
+        """
+        line_vals_list = super()._prepare_move_line_default_vals(
+            counterpart_account_id=counterpart_account_id
+        )
+
+        rate = self.manual_currency_rate
+        company_currency = self.company_id.currency_id
+        if not rate or self.currency_id == company_currency or len(line_vals_list) < 2:
+            return line_vals_list
+
+        return self.env['account.move']._apply_manual_rate_to_line_vals(line_vals_list, rate, company_currency)
+
+    def _synchronize_to_moves(self, changed_fields):
+        """
+        Por qué: Regenerar liquidez y suspenso si cambia la tasa manual
+        Tip: El nativo solo reacciona a montos, monedas, contacto y referencia
+        """
+        if 'manual_currency_rate' in changed_fields:
+            changed_fields = set(changed_fields) | {'amount'}
+        return super()._synchronize_to_moves(changed_fields)
@@ -1,264 +1,448 @@
 # -*- coding: utf-8 -*-
+import copy
+from collections import defaultdict
+
 from odoo import models, fields, api
+from odoo.exceptions import UserError
+from odoo.tools import float_compare
+from odoo.tools.misc import formatLang
+
+# Por qué: Signo del residual en moneda documento según tipo de factura
+# Tip: Cobrar suma, pagar resta (mismo criterio que amount_residual_signed)
+RESIDUAL_SIGN = {
+    'out_invoice': 1,
+    'out_refund': -1,
+    'in_invoice': -1,
+    'in_refund': 1,
+}
+
+# Por qué: Desvío máximo entre tasa manual y tasa del sistema antes de enviar
+PARAM_AFIP_RATE_TOLERANCE = 'l10n_ar_custom_currency.afip_rate_tolerance'
 
 
 class AccountMove(models.Model):
-    _inherit = 'account.move'
+    _name = 'account.move'
+    _inherit = ['account.move', 'manual.currency.rate.mixin']
+
+    # Por qué: Mismo mixin que las órdenes; la tasa del sistema se toma
+    # a la fecha de factura
+    _manual_rate_date_field = 'invoice_date'
+    _manual_rate_fallback_date_field = 'date'
+    _company_currency_amount_fields = {
+        'amount_untaxed_signed_company': 'amount_untaxed',
+        'amount_tax_signed_company': 'amount_tax',
+        'amount_total_signed_company': 'amount_total',
+    }
 
     # Por qué: Mantener tasa manual en factura generada desde orden
     # Patrón: Propagation Pattern - propagar dato del origen
     manual_currency_rate = fields.Float(
-        string='Tasa de Cambio Manual',
-        digits=(12, 6),
         help='Tasa de cambio manual heredada de la orden de compra/venta.'
     )
 
-    # Por qué: Visibilidad condicional
-    show_manual_rate = fields.Boolean(
-        compute='_compute_show_manual_rate',
-        string='Mostrar Tasa Manual'
-    )
-
-    @api.depends('currency_id', 'company_id')
-    def _compute_show_manual_rate(self):
-        """
-        Por qué: Controlar visibilidad en facturas
-        Tip: Consistente con órdenes
-        """
-        for move in self:
-            move.show_manual_rate = (
-                move.currency_id
-                and move.company_id.currency_id
-                and move.currency_id != move.company_id.currency_id
-            )
-
-    @api.onchange('currency_id')
-    def _onchange_currency_id(self):
-        """
-        Por qué: Limpiar tasa manual si se cambia a moneda de la compañía
-        Tip: Evitar inconsistencias
-        """
-        res = super()._onchange_currency_id()
-        if self.currency_id == self.company_id.currency_id:
-            self.manual_currency_rate = 0.0
-        return res
-
-    # Por qué: Permitir impresión en moneda compañía
-    print_in_company_currency = fields.Boolean(
-        string='Imprimir en Moneda Compañía',
-        default=False,
-        help='Si está marcado, el reporte se imprime en la moneda de la compañía.'
-    )
-
     # Por qué: Montos convertidos para reportes
     amount_untaxed_signed_company = fields.Monetary(
         string='Base Imponible (Moneda Compañía)',
         compute='_compute_amounts_company_currency',
-        currency_field='company_currency_id'
+        currency_field='company_currency_id',
+        store=True
     )
     amount_tax_signed_company = fields.Monetary(
         string='Impuestos (Moneda Compañía)',
         compute='_compute_amounts_company_currency',
-        currency_field='company_currency_id'
+        currency_field='company_currency_id',
+        store=True
     )
     amount_total_signed_company = fields.Monetary(
         string='Total (Moneda Compañía)',
         compute='_compute_amounts_company_currency',
-        currency_field='company_currency_id'
+        currency_field='company_currency_id',
+        store=True
+    )
+
+    # Por qué: Montos del desglose de impuestos ya convertidos a moneda compañía
+    # Tip: Solo números (sin textos ni etiquetas): el formato depende del
+    # idioma del reporte y se aplica al imprimir (_get_tax_totals_company)
+    tax_totals_company = fields.Json(
+        string='Montos de Impuestos (Moneda Compañía)',
+        compute='_compute_amounts_company_currency',
+        store=True,
+        exportable=False
+    )
+    # Por qué: Desglose listo para el widget, formateado en el idioma del usuario
+    tax_totals_company_display = fields.Binary(
+        string='Totales de Impuestos (Moneda Compañía)',
+        compute='_compute_tax_totals_company_display',
+        exportable=False
     )
 
-    @api.depends('amount_untaxed_signed', 'amount_tax_signed', 'amount_total_signed', 'currency_id', 'manual_currency_rate')
     def _compute_amounts_company_currency(self):
         """
-        Por qué: Calcular montos en moneda compañía para facturas
-        Tip: Usa campos *_signed para respetar signo (invoice/refund)
+        Por qué: Convertir también el desglose de impuestos en la misma pasada
+        Tip: Sin signo, igual que tax_totals; se reutiliza la tasa efectiva
+             ya resuelta en lote. Se parte de los totales que imprime el
+             reporte (l10n_ar oculta el IVA en comprobantes B). Grupos por
+             tax_group_id y subtotales por posición, para no depender de
+             etiquetas traducidas
         """
+        super()._compute_amounts_company_currency()
         for move in self:
-            rate = move._get_effective_rate()
+            tax_totals = move.tax_totals and move._get_tax_totals_for_report()
+            if not tax_totals:
+                move.tax_totals_company = False
+                continue
+            rate = move._get_tax_totals_company_rate()
+            currency = move.company_id.currency_id
+            move.tax_totals_company = {
+                'totals': self._convert_tax_totals_amounts(tax_totals, rate, currency),
+                'groups': {
+                    str(group.get('tax_group_id')): self._convert_tax_totals_amounts(group, rate, currency)
+                    for groups in (tax_totals.get('groups_by_subtotal') or {}).values()
+                    for group in groups
+                },
+                'subtotals': [
+                    self._convert_tax_totals_amounts(subtotal, rate, currency)
+                    for subtotal in tax_totals.get('subtotals') or []
+                ],
+            }
+
+    def _get_tax_totals_for_report(self):
+        """
+        Por qué: Mismos totales que usa el reporte de factura
+        Tip: l10n_ar reemplaza tax_totals para no discriminar IVA cuando
+             corresponde
+        """
+        self.ensure_one()
+        if self.country_code == 'AR':
+            return self._l10n_ar_get_invoice_totals_for_report()
+        return self.tax_totals
+
+    def _get_tax_totals_company_rate(self):
+        self.ensure_one()
+        if self.currency_id == self.company_id.currency_id:
+            return 1.0
+        return self.effective_currency_rate
 
-            if move.currency_id == move.company_id.currency_id:
-                move.amount_untaxed_signed_company = move.amount_untaxed_signed
-                move.amount_tax_signed_company = move.amount_tax_signed
-                move.amount_total_signed_company = move.amount_total_signed
-            else:
-                move.amount_untaxed_signed_company = move.amount_untaxed_signed * rate
-                move.amount_tax_signed_company = move.amount_tax_signed * rate
-                move.amount_total_signed_company = move.amount_total_signed * rate
+    @api.model
+    def _convert_tax_totals_amounts(self, values, rate, currency):
+        """
+        Por qué: Convertir cada monto de tax_totals que tiene su formatted_*
+        """
+        return {
+            key: currency.round(value * rate)
+            for key, value in values.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+            and f'formatted_{key}' in values
+        }
+
+    @api.depends_context('lang')
+    @api.depends('tax_totals', 'tax_totals_company')
+    def _compute_tax_totals_company_display(self):
+        for move in self:
+            move.tax_totals_company_display = move.tax_totals and move._get_tax_totals_company(
+                move._get_tax_totals_for_report()
+            )
 
-    def _get_effective_rate(self):
+    def _get_tax_totals_company(self, tax_totals):
         """
-        Por qué: Obtener tasa efectiva (manual o sistema)
-        Tip: Si viene de orden, usa su tasa; sino usa invoice_date
+        Por qué: Convertir a moneda compañía los totales que ya tiene el reporte
+        Patrón: Merge - etiquetas y forma del tax_totals recibido (idioma del
+                reporte, ajustes de l10n_ar) + montos almacenados
+        Tip: Un monto sin equivalente almacenado se convierte con la tasa
+             efectiva, así otros módulos que alteren tax_totals no rompen
+             el reporte
         """
         self.ensure_one()
+        if not tax_totals:
+            return tax_totals
+
+        amounts = self.tax_totals_company or {}
+        rate = self._get_tax_totals_company_rate()
+        currency = self.company_id.currency_id
+        tax_totals = copy.deepcopy(tax_totals)
+        self._apply_tax_totals_amounts(tax_totals, amounts.get('totals', {}), rate, currency)
+        for groups in (tax_totals.get('groups_by_subtotal') or {}).values():
+            for group in groups:
+                self._apply_tax_totals_amounts(
+                    group, amounts.get('groups', {}).get(str(group.get('tax_group_id')), {}), rate, currency
+                )
+        stored_subtotals = amounts.get('subtotals', [])
+        for index, subtotal in enumerate(tax_totals.get('subtotals') or []):
+            self._apply_tax_totals_amounts(
+                subtotal, stored_subtotals[index] if index < len(stored_subtotals) else {}, rate, currency
+            )
+        return tax_totals
 
-        if self.manual_currency_rate:
-            return self.manual_currency_rate
+    def _apply_tax_totals_amounts(self, values, amounts, rate, currency):
+        for key, value in list(values.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and f'formatted_{key}' in values:
+                amount = amounts.get(key, currency.round(value * rate))
+                values[key] = amount
+                values[f'formatted_{key}'] = formatLang(self.env, amount, currency_obj=currency)
 
-        return self.currency_id._get_conversion_rate(
-            self.currency_id,
-            self.company_id.currency_id,
-            self.company_id,
-            self.invoice_date or fields.Date.today()
-        )
+    def _get_company_currency_sign(self):
+        """
+        Por qué: Montos *_signed_company con el signo de la factura
+        Tip: Se parte del monto en moneda documento; los campos *_signed
+             nativos ya están en moneda compañía
+        """
+        self.ensure_one()
+        return RESIDUAL_SIGN.get(self.move_type, 1)
 
-    def action_post(self):
+    @api.model
+    def _get_company_currency_sign_sql(self):
+        return 'CASE doc.move_type {} ELSE 1 END'.format(' '.join(
+            f"WHEN '{move_type}' THEN {sign}" for move_type, sign in RESIDUAL_SIGN.items()
+        ))
+
+    @api.model
+    def _apply_manual_rate_to_line_vals(self, line_vals_list, rate, company_currency):
         """
-        Por qué: Informar tasa de cambio al validar factura
-        Patrón: Observer Pattern - notificar validación
+        Por qué: Valuar a la tasa manual los asientos que arma el nativo
+                 (pagos y líneas de extracto)
+        Tip: La contrapartida (índice 1) absorbe el redondeo para cuadrar
         """
-        res = super().action_post()
+        total_balance = 0.0
+        for index, line_vals in enumerate(line_vals_list):
+            if index == 1:
+                continue
+            balance = company_currency.round(line_vals.get('amount_currency', 0.0) * rate)
+            self._set_line_vals_balance(line_vals, balance)
+            total_balance += balance
+        self._set_line_vals_balance(line_vals_list[1], -total_balance)
+        return line_vals_list
 
-        for move in self:
-            if move.currency_id != move.company_id.currency_id:
-                move._post_currency_rate_message('post')
+    @api.model
+    def _set_line_vals_balance(self, line_vals, balance):
+        """
+        Por qué: Escribir el saldo respetando el formato de los vals nativos
+        Tip: Según la versión los vals traen balance o debit/credit
+        """
+        if 'balance' in line_vals:
+            line_vals['balance'] = balance
+        else:
+            line_vals['debit'] = balance if balance > 0.0 else 0.0
+            line_vals['credit'] = -balance if balance < 0.0 else 0.0
 
-        return res
+    @api.model
+    def _get_manual_rate_recompute_domain(self):
+        """
+        Por qué: Solo facturas en borrador; pagos y asientos varios no se
+                 recalculan con cada carga de tasas
+        Tip: Una factura validada conserva la tasa con la que se contabilizó
+             (la misma que se informa a AFIP)
+        """
+        return super()._get_manual_rate_recompute_domain() + [
+            ('move_type', 'in', self.get_invoice_types(include_receipts=True)),
+            ('state', '=', 'draft'),
+        ]
+
+    @api.model
+    def _get_company_currency_amount_depends(self):
+        return super()._get_company_currency_amount_depends() + ['move_type', 'tax_totals']
 
-    def write(self, vals):
+    @api.model
+    def _get_currency_exposure_domain(self):
         """
-        Por qué: Detectar cambio en modo de impresión
+        Por qué: Facturas abiertas que generan exposición cambiaria
         """
-        old_print_flags = {rec.id: rec.print_in_company_currency for rec in self}
+        return [
+            ('state', '=', 'posted'),
+            ('move_type', 'in', list(RESIDUAL_SIGN)),
+            ('payment_state', 'in', ('not_paid', 'partial')),
+        ]
 
-        res = super().write(vals)
+    @api.model
+    def _get_currency_exposure_values(self, domain, date, by_partner=False):
+        """
+        Por qué: Agregar residuales abiertos en moneda extranjera
+        Patrón: Batch Query - un read_group + una consulta de tasas
+        Tip: El valor registrado (amount_residual_signed) ya refleja la tasa
+             con la que se contabilizó cada factura (manual o sistema); el
+             valor del día usa la tasa del sistema a `date`. Cada compañía
+             se valúa en su propia moneda
+        """
+        groupby = ['company_id', 'currency_id', 'move_type']
+        if by_partner:
+            groupby.append('commercial_partner_id')
+        groups = self._read_group(
+            domain=self._get_currency_exposure_domain() + list(domain),
+            groupby=groupby,
+            aggregates=['amount_residual:sum', 'amount_residual_signed:sum'],
+        )
 
-        if 'print_in_company_currency' in vals:
-            for move in self:
-                old_value = old_print_flags.get(move.id)
-                if old_value != move.print_in_company_currency:
-                    move._post_print_mode_message()
+        totals = defaultdict(lambda: {'amount_currency': 0.0, 'amount_booked': 0.0})
+        for company, currency, move_type, *partner, residual, residual_signed in groups:
+            if currency == company.currency_id:
+                continue
+            exposure_type = 'receivable' if move_type.startswith('out_') else 'payable'
+            key = (company, currency, exposure_type, partner[0] if partner else None)
+            totals[key]['amount_currency'] += RESIDUAL_SIGN[move_type] * residual
+            totals[key]['amount_booked'] += residual_signed
+
+        # Por qué: Todas las tasas del día en una sola consulta multi-compañía
+        rate_keys = {
+            (company, currency): (currency.id, company.currency_id.id, company.id, date)
+            for company, currency, _exposure_type, _partner in totals
+        }
+        rates = self.env['res.currency']._get_conversion_rates_batch(rate_keys.values())
+
+        values = []
+        for (company, currency, exposure_type, partner), amounts in totals.items():
+            amount_today = company.currency_id.round(
+                amounts['amount_currency'] * rates[rate_keys[(company, currency)]]
+            )
+            row = {
+                'company_id': company.id,
+                'currency_id': currency.id,
+                'exposure_type': exposure_type,
+                'amount_currency': amounts['amount_currency'],
+                'amount_booked': amounts['amount_booked'],
+                'amount_today': amount_today,
+                'amount_difference': amount_today - amounts['amount_booked'],
+            }
+            if by_partner:
+                row['partner_id'] = partner.id
+            values.append(row)
+        return values
 
+    def action_post(self):
+        """
+        Por qué: Informar tasa de cambio al validar factura
+        Patrón: Observer Pattern - notificar validación
+        """
+        res = super().action_post()
+        self._post_currency_rate_messages('post')
         return res
 
-    def _post_currency_rate_message(self, action_type='post'):
+    def _set_afip_rate(self):
         """
-        Por qué: Mensaje en chatter con información de tasa en facturas
-        Tip: Diferencia visual según tipo de factura
+        Por qué: Enviar a AFIP la misma tasa con la que se contabilizó la factura
+        Patrón: Batch Write - una escritura por tasa distinta
+        Tip: La tasa manual siempre gana; sin tasa manual se congela la tasa
+             efectiva solo si l10n_ar no tenía una. El resto lo resuelve l10n_ar
         """
-        self.ensure_one()
-
-        rate = self._get_effective_rate()
-        rate_source = 'manual' if self.manual_currency_rate else 'sistema'
+        foreign = self._get_l10n_ar_foreign_invoices().filtered(
+            lambda move: move.manual_currency_rate or not move.l10n_ar_currency_rate
+        )
+        moves_by_rate = defaultdict(lambda: self.env['account.move'])
+        for move in foreign:
+            moves_by_rate[move.effective_currency_rate] |= move
+        for rate, moves in moves_by_rate.items():
+            moves.write({'l10n_ar_currency_rate': rate})
+        return super(AccountMove, self - foreign)._set_afip_rate()
+
+    def _get_l10n_ar_foreign_invoices(self):
+        """
+        Por qué: Facturas argentinas con documento en moneda extranjera
+        Tip: Mismo criterio que l10n_ar para decidir qué facturas informa
+        """
+        return self.filtered(
+            lambda move: move.company_id.account_fiscal_country_id.code == 'AR'
+            and move.l10n_latam_use_documents
+            and move.is_invoice()
+            and move.currency_id != move.company_id.currency_id
+        )
 
-        # Por qué: Diferentes iconos y colores según tipo de documento
+    def _check_l10n_ar_currency_rates(self):
+        """
+        Por qué: Revisar un lote completo de facturas antes de enviarlo a AFIP
+        Patrón: Batch Validation - tasas del sistema en una sola consulta
+        Tip: Devuelve una lista de (factura, problema); vacía si todo está bien
+        """
+        invoices = self._get_l10n_ar_foreign_invoices()
+        tolerance = float(self.env['ir.config_parameter'].sudo().get_param(PARAM_AFIP_RATE_TOLERANCE, 0.1))
+
+        rate_keys = {
+            move.id: (
+                move.currency_id.id,
+                move.company_id.currency_id.id,
+                move.company_id.id,
+                move.invoice_date or fields.Date.context_today(move),
+            )
+            for move in invoices.filtered('manual_currency_rate')
+        }
+        system_rates = self.env['res.currency']._get_conversion_rates_batch(rate_keys.values())
+
+        issues = []
+        for move in invoices:
+            rate = move.effective_currency_rate
+            if rate <= 0:
+                issues.append((move, 'Sin tasa de cambio'))
+                continue
+            if move.state == 'posted' and float_compare(
+                move.l10n_ar_currency_rate, rate, precision_digits=6
+            ):
+                issues.append((
+                    move,
+                    f'Tasa AFIP {move.l10n_ar_currency_rate:.6f} distinta de la tasa aplicada {rate:.6f}',
+                ))
+            if move.id in rate_keys:
+                system_rate = system_rates[rate_keys[move.id]]
+                if system_rate and abs(rate - system_rate) / system_rate > tolerance:
+                    issues.append((
+                        move,
+                        f'Tasa manual {rate:.6f} se desvía más de {tolerance:.0%} '
+                        f'de la tasa del sistema {system_rate:.6f}',
+                    ))
+        return issues
+
+    def action_l10n_ar_validate_currency_rates(self):
+        """
+        Por qué: Acción masiva desde la lista de facturas
+        Tip: Informa todos los problemas juntos en lugar de factura por factura
+        """
+        issues = self._check_l10n_ar_currency_rates()
+        if issues:
+            raise UserError(
+                'Problemas de tasa de cambio para AFIP:\n'
+                + '\n'.join(f'- {move.display_name}: {message}' for move, message in issues)
+            )
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Tasas de Cambio',
+                'message': f'{len(self._get_l10n_ar_foreign_invoices())} facturas en moneda extranjera verificadas sin problemas.',
+                'type': 'success',
+                'sticky': False,
+            },
+        }
+
+    def _get_currency_rate_message_style(self, action_type):
+        """
+        Por qué: Diferentes iconos y colores según tipo de documento
+        Tip: Incluye la fecha de referencia de la tasa
+        """
+        style = super()._get_currency_rate_message_style(action_type)
         if self.move_type == 'out_invoice':
-            icon = '📄'
-            title = 'Factura de Cliente Validada'
-            color = '#00a09d'
-            bg_color = '#f0f9ff'
+            style.update(icon='📄', title='Factura de Cliente Validada', color='#00a09d', bg_color='#f0f9ff')
         elif self.move_type == 'in_invoice':
-            icon = '📥'
-            title = 'Factura de Proveedor Validada'
-            color = '#875a7b'
-            bg_color = '#fef5ff'
+            style.update(icon='📥', title='Factura de Proveedor Validada', color='#875a7b', bg_color='#fef5ff')
         elif self.move_type == 'out_refund':
-            icon = '🔄'
-            title = 'Nota de Crédito Cliente Validada'
-            color = '#f06050'
-            bg_color = '#fff0f0'
+            style.update(icon='🔄', title='Nota de Crédito Cliente Validada', color='#f06050', bg_color='#fff0f0')
         elif self.move_type == 'in_refund':
-            icon = '↩️'
-            title = 'Nota de Crédito Proveedor Validada'
-            color = '#f06050'
-            bg_color = '#fff0f0'
+            style.update(icon='↩️', title='Nota de Crédito Proveedor Validada', color='#f06050', bg_color='#fff0f0')
         else:
-            icon = '📋'
-            title = 'Asiento Validado'
-            color = '#6c757d'
-            bg_color = '#f8f9fa'
-
-        message = f"""
-        <div style="padding: 10px; border-left: 4px solid {color}; background-color: {bg_color}; margin: 5px 0;">
-            <h4 style="margin: 0 0 10px 0; color: {color};">
-                {icon} {title} - Tipo de Cambio Aplicado
-            </h4>
-            <table style="width: 100%; border-collapse: collapse;">
-                <tr>
-                    <td style="padding: 5px; font-weight: bold; width: 40%;">Moneda del documento:</td>
-                    <td style="padding: 5px;">{self.currency_id.name} ({self.currency_id.symbol})</td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px; font-weight: bold;">Moneda de la compañía:</td>
-                    <td style="padding: 5px;">{self.company_id.currency_id.name} ({self.company_id.currency_id.symbol})</td>
-                </tr>
-                <tr style="background-color: {bg_color};">
-                    <td style="padding: 5px; font-weight: bold;">Tipo de cambio aplicado:</td>
-                    <td style="padding: 5px; font-size: 16px; font-weight: bold; color: {color};">
-                        1 {self.currency_id.name} = {rate:,.6f} {self.company_id.currency_id.name}
-                    </td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px; font-weight: bold;">Origen de la tasa:</td>
-                    <td style="padding: 5px;">
-                        <span style="background-color: {'#ffd700' if rate_source == 'manual' else '#90ee90'};
-                                     padding: 2px 8px; border-radius: 3px; font-weight: bold;">
-                            {rate_source.upper()}
-                        </span>
-                    </td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px; font-weight: bold;">Fecha de referencia:</td>
-                    <td style="padding: 5px;">{self.invoice_date or 'N/A'}</td>
-                </tr>
-                <tr>
-                    <td style="padding: 5px; font-weight: bold;">Total convertido:</td>
-                    <td style="padding: 5px;">
-                        {abs(self.amount_total_signed):,.2f} {self.currency_id.symbol} =
-                        <strong>{abs(self.amount_total_signed) * rate:,.2f} {self.company_id.currency_id.symbol}</strong>
-                    </td>
-                </tr>
-            </table>
-            <p style="margin: 10px 0 0 0; font-size: 12px; color: #666; font-style: italic;">
-                Esta tasa se ha aplicado en los asientos contables generados.
-            </p>
-        </div>
-        """
-
-        self.message_post(
-            body=message,
-            subject=f'Tipo de Cambio Aplicado',
-            message_type='notification',
-            subtype_xmlid='mail.mt_note'
-        )
-
-    def _post_print_mode_message(self):
+            style.update(icon='📋', title='Asiento Validado', color='#6c757d', bg_color='#f8f9fa')
+        style.update({
+            'row_bg_color': style['bg_color'],
+            'subject': 'Tipo de Cambio Aplicado',
+            'footer': 'Esta tasa se ha aplicado en los asientos contables generados.',
+            'show_date': True,
+        })
+        return style
+
+    def _get_print_mode_message_style(self):
         """
-        Por qué: Notificar cambio en modo de impresión para facturas
+        Por qué: Estilo neutro para el aviso de impresión en facturas
         """
-        self.ensure_one()
-
-        if self.print_in_company_currency:
-            icon = '🖨️'
-            mode = f'<strong style="color: #00a09d;">Moneda de la Compañía ({self.company_id.currency_id.name})</strong>'
-            explanation = f'El reporte de factura se imprimirá en {self.company_id.currency_id.name}, ' \
-                         f'aplicando la tasa de cambio configurada.'
-        else:
-            icon = '📄'
-            mode = f'<strong style="color: #875a7b;">Moneda Original ({self.currency_id.name})</strong>'
-            explanation = f'El reporte de factura se imprimirá en {self.currency_id.name}, ' \
-                         f'la moneda original del documento.'
-
-        message = f"""
-        <div style="padding: 10px; border-left: 4px solid #6c757d; background-color: #f8f9fa; margin: 5px 0;">
-            <h4 style="margin: 0 0 10px 0; color: #6c757d;">
-                {icon} Modo de Impresión Modificado
-            </h4>
-            <p style="margin: 5px 0;">
-                <strong>Nuevo modo:</strong> {mode}
-            </p>
-            <p style="margin: 5px 0; font-size: 12px; color: #666; font-style: italic;">
-                {explanation}
-            </p>
-        </div>
-        """
-
-        self.message_post(
-            body=message,
-            subject='Modo de Impresión Modificado',
-            message_type='notification',
-            subtype_xmlid='mail.mt_note'
-        )
+        return {
+            'color': '#6c757d',
+            'bg_color': '#f8f9fa',
+            'company_color': '#00a09d',
+            'report_label': 'El reporte de factura se imprimirá',
+        }
 
     def _recompute_dynamic_lines(self, recompute_all_taxes=False, recompute_tax_base_amount=False):
         """
@@ -282,6 +466,21 @@ class AccountMove(models.Model):
 class AccountMoveLine(models.Model):
     _inherit = 'account.move.line'
 
+    @api.depends('move_id.manual_currency_rate')
+    def _compute_currency_rate(self):
+        """
+        Por qué: Registrar los saldos contables con la tasa manual del documento
+        Patrón: Template Method - ajustar el resultado del cálculo nativo
+        Tip: currency_rate es compañía -> moneda extranjera (inversa de la
+             tasa manual). Si factura y pago usan la misma tasa, sus saldos
+             coinciden y la conciliación no genera diferencia de cambio
+        """
+        super()._compute_currency_rate()
+        for line in self:
+            manual_rate = line.move_id.manual_currency_rate
+            if manual_rate and line.currency_id and line.currency_id != line.company_currency_id:
+                line.currency_rate = 1.0 / manual_rate
+
     def _get_fields_onchange_balance_model(
         self, quantity, discount, amount_currency, move_type, currency, taxes, price_subtotal, force_computation=False
     ):
@@ -329,3 +528,4 @@ class AccountMoveLine(models.Model):
             company=company,
             date=date
         )
+
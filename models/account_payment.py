@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class AccountPayment(models.Model):
+    _inherit = 'account.payment'
+
+    # Por qué: manual_currency_rate llega por _inherits desde account.move,
+    # el pago lo comparte con su asiento sin campo propio
+
+    def _prepare_move_line_default_vals(self, write_off_line_vals=None, force_balance=None):
+        """
+        Por qué: Valuar el asiento del pago con la tasa manual acordada
+        Patrón: Template Method - post-procesar las líneas nativas
+        Tip: Con la misma tasa en factura y pago, los saldos en moneda
+             compañía coinciden y no se crea asiento de diferencia de cambio
+        """
+        line_vals_list = super()._prepare_move_line_default_vals(
+            write_off_line_vals=write_off_line_vals,
+            force_balance=force_balance
+        )
+
+        rate = self.manual_currency_rate
+        company_currency = self.company_id.currency_id
+        if not rate or self.currency_id == company_currency or len(line_vals_list) < 2:
+            return line_vals_list
+
+        return self.env['account.move']._apply_manual_rate_to_line_vals(line_vals_list, rate, company_currency)
+
+    def _get_trigger_fields_to_synchronize(self):
+        """
+        Por qué: Regenerar el asiento si cambia la tasa manual del pago
+        """
+        return super()._get_trigger_fields_to_synchronize() + ('manual_currency_rate',)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+PARAM_LAST_REFRESH = 'l10n_ar_custom_currency.exposure_snapshot_last_refresh'
+PARAM_RATE_DATE = 'l10n_ar_custom_currency.exposure_snapshot_rate_date'
+
+# Por qué: Margen para no perder facturas escritas por transacciones
+# concurrentes que todavía no habían confirmado en la corrida anterior
+REFRESH_OVERLAP = timedelta(minutes=10)
+
+
+class CurrencyExposureSnapshot(models.Model):
+    _name = 'l10n_ar.currency.exposure.snapshot'
+    _description = 'Snapshot de Exposición en Moneda Extranjera'
+    _order = 'company_id, currency_id, exposure_type, partner_id'
+
+    # Por qué: Tabla materializada por moneda, contacto y compañía
+    # Patrón: Materialized View - los dashboards leen filas ya agregadas
+    company_id = fields.Many2one('res.company', string='Compañía', required=True, readonly=True, index=True)
+    company_currency_id = fields.Many2one(
+        'res.currency',
+        related='company_id.currency_id',
+        string='Moneda Compañía'
+    )
+    currency_id = fields.Many2one('res.currency', string='Moneda', required=True, readonly=True, index=True)
+    partner_id = fields.Many2one('res.partner', string='Contacto', readonly=True, index=True)
+    exposure_type = fields.Selection(
+        [('receivable', 'A Cobrar'), ('payable', 'A Pagar')],
+        string='Tipo',
+        required=True,
+        readonly=True
+    )
+    amount_currency = fields.Monetary(
+        string='Residual (Moneda Extranjera)',
+        currency_field='currency_id',
+        readonly=True
+    )
+    amount_booked = fields.Monetary(
+        string='Valor Registrado',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    amount_today = fields.Monetary(
+        string='Valor a Tasa del Día',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    amount_difference = fields.Monetary(
+        string='Diferencia',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+
+    _sql_constraints = [
+        ('exposure_key_unique',
+         'unique(company_id, currency_id, partner_id, exposure_type)',
+         'Ya existe una fila de exposición para esta compañía, moneda, contacto y tipo.'),
+    ]
+
+    @api.model
+    def _cron_refresh_snapshot(self):
+        """
+        Por qué: Mantener el snapshot al día sin recalcular todo en cada corrida
+        Patrón: Incremental Refresh - solo claves con facturas modificadas
+        Tip: Si cambió el día se hace un refresco completo, porque el valor
+             a tasa del día cambia para todas las filas
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        refresh_start = self.env.cr.now()
+        today = fields.Date.context_today(self)
+        last_refresh = ICP.get_param(PARAM_LAST_REFRESH)
+
+        if not last_refresh or ICP.get_param(PARAM_RATE_DATE) != fields.Date.to_string(today):
+            self._refresh_full(today)
+        else:
+            since = fields.Datetime.to_datetime(last_refresh) - REFRESH_OVERLAP
+            self._refresh_incremental(since, today)
+
+        ICP.set_param(PARAM_LAST_REFRESH, fields.Datetime.to_string(refresh_start))
+        ICP.set_param(PARAM_RATE_DATE, fields.Date.to_string(today))
+
+    @api.model
+    def _refresh_full(self, date):
+        """
+        Por qué: Reconstruir el snapshot completo (primera corrida o cambio de día)
+        """
+        values = self.env['account.move'].sudo()._get_currency_exposure_values([], date, by_partner=True)
+        self.sudo().search([]).unlink()
+        self.sudo().create(values)
+        _logger.info('Currency exposure snapshot rebuilt: %s rows', len(values))
+
+    @api.model
+    def _refresh_incremental(self, since, date):
+        """
+        Por qué: Recalcular solo las claves (compañía, moneda, contacto)
+                 con facturas modificadas desde la última corrida o cuyos
+                 totales ya no coinciden con el snapshot
+        Tip: Un read_group obtiene las claves afectadas sin leer facturas
+        """
+        Move = self.env['account.move'].sudo()
+        changed_groups = Move._read_group(
+            domain=[
+                ('write_date', '>=', since),
+                ('move_type', 'in', ('out_invoice', 'out_refund', 'in_invoice', 'in_refund')),
+            ],
+            groupby=['company_id', 'currency_id', 'commercial_partner_id'],
+        )
+        keys = {
+            (company.id, currency.id, partner.id)
+            for company, currency, partner in changed_groups
+        }
+        # Por qué: Una factura que cambió de contacto o moneda deja su clave
+        # anterior desactualizada; se detecta comparando totales registrados
+        keys |= self._get_mismatched_keys()
+        if not keys:
+            return
+
+        key_domain = [
+            ('company_id', 'in', list({key[0] for key in keys})),
+            ('currency_id', 'in', list({key[1] for key in keys})),
+        ]
+        partner_ids = list({key[2] for key in keys})
+
+        values = [
+            row for row in Move._get_currency_exposure_values(
+                key_domain + [('commercial_partner_id', 'in', partner_ids)], date, by_partner=True
+            )
+            if (row['company_id'], row['currency_id'], row['partner_id']) in keys
+        ]
+        stale = self.sudo().search(key_domain + [('partner_id', 'in', partner_ids)]).filtered(
+            lambda row: (row.company_id.id, row.currency_id.id, row.partner_id.id) in keys
+        )
+        stale.unlink()
+        self.sudo().create(values)
+        _logger.info(
+            'Currency exposure snapshot refreshed: %s keys, %s rows', len(keys), len(values)
+        )
+
+    @api.model
+    def _get_mismatched_keys(self):
+        """
+        Por qué: Claves cuyo valor registrado difiere del residual actual
+        Patrón: Reconciliation - dos read_group sin tasas ni lectura de facturas
+        Tip: Incluye claves que ya no tienen facturas abiertas (fila huérfana)
+             y claves nuevas sin fila
+        """
+        Move = self.env['account.move'].sudo()
+        current = {}
+        for company, currency, partner, residual_signed in Move._read_group(
+            domain=Move._get_currency_exposure_domain(),
+            groupby=['company_id', 'currency_id', 'commercial_partner_id'],
+            aggregates=['amount_residual_signed:sum'],
+        ):
+            if currency != company.currency_id:
+                current[(company.id, currency.id, partner.id)] = (company.currency_id, residual_signed)
+
+        stored = {
+            (company.id, currency.id, partner.id): amount_booked
+            for company, currency, partner, amount_booked in self.sudo()._read_group(
+                domain=[],
+                groupby=['company_id', 'currency_id', 'partner_id'],
+                aggregates=['amount_booked:sum'],
+            )
+        }
+
+        mismatched = set(stored) ^ set(current)
+        for key in set(stored) & set(current):
+            company_currency, residual_signed = current[key]
+            if company_currency.compare_amounts(stored[key], residual_signed):
+                mismatched.add(key)
+        return mismatched
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api
+from odoo.tools import escape_psql
+
+_logger = logging.getLogger(__name__)
+
+# Por qué: Prefijo común para identificar los PDFs cacheados
+# Tip: Se usa tanto para buscar aciertos como para la purga periódica
+PDF_CACHE_PREFIX = 'company_currency_pdf_'
+
+# Por qué: Solo los documentos de este módulo imprimen en moneda compañía
+# Tip: {modelo: campo de líneas}, las líneas también forman parte de la clave
+PDF_CACHE_MODELS = {
+    'sale.order': 'order_line',
+    'purchase.order': 'order_line',
+    'account.move': 'line_ids',
+}
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        """
+        Por qué: Evitar re-renderizar con wkhtmltopdf PDFs ya generados
+        Patrón: Cache-Aside - buscar en caché, si no existe renderizar y guardar
+        Tip: La clave incluye tasa efectiva y write_date, cualquier cambio
+             genera una clave nueva y el PDF anterior queda obsoleto
+        """
+        report = self._get_report(report_ref)
+        record = self._get_company_currency_cache_record(report, res_ids, data)
+        if not record:
+            return super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+
+        cache_key = self._get_company_currency_cache_key(report, record)
+        Attachment = self.env['ir.attachment'].sudo()
+        cached = Attachment.search([
+            ('res_model', '=', 'ir.actions.report'),
+            ('res_id', '=', report.id),
+            ('name', '=', cache_key),
+        ], limit=1)
+        if cached:
+            return cached.raw, 'pdf'
+
+        pdf_content, content_type = super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        if content_type == 'pdf':
+            self._store_company_currency_pdf(report, record, cache_key, pdf_content)
+        return pdf_content, content_type
+
+    def _get_company_currency_cache_record(self, report, res_ids, data):
+        """
+        Por qué: Determinar si el render es cacheable
+        Tip: Solo un documento por render, sin data custom y con
+             print_in_company_currency activo
+        """
+        if report.report_type != 'qweb-pdf' or report.model not in PDF_CACHE_MODELS:
+            return None
+        if data or not res_ids or len(res_ids) != 1:
+            return None
+        if not self._is_company_currency_pdf_cache_enabled():
+            return None
+
+        record = self.env[report.model].browse(res_ids).exists()
+        if not record or not record.print_in_company_currency:
+            return None
+        return record
+
+    @api.model
+    def _is_company_currency_pdf_cache_enabled(self):
+        """
+        Por qué: Permitir desactivar la caché sin desinstalar el módulo
+        """
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'l10n_ar_custom_currency.pdf_cache_enabled', 'True'
+        )
+        return param not in ('False', '0', '')
+
+    def _get_company_currency_cache_key(self, report, record):
+        """
+        Por qué: Clave determinística por documento y estado relevante
+        Tip: Documento, flag de impresión, tasa efectiva, idioma, grupos y
+             compañías permitidas del usuario (secciones con groups= o datos
+             por compañía) y write_date de todo lo que se imprime
+             (ver _get_company_currency_cache_dates)
+        """
+        rate = record._get_effective_rate()
+        raw_key = '|'.join([
+            report.model,
+            str(record.id),
+            str(record.print_in_company_currency),
+            f'{rate:.10f}',
+            self.env.lang or '',
+            ','.join(map(str, sorted(self.env.user.groups_id.ids))),
+            ','.join(map(str, sorted(self.env.companies.ids))),
+        ] + [
+            fields.Datetime.to_string(date) if date else ''
+            for date in self._get_company_currency_cache_dates(report, record)
+        ])
+        digest = hashlib.sha1(raw_key.encode()).hexdigest()
+        return f'{PDF_CACHE_PREFIX}{report.model}_{record.id}_{digest}.pdf'
+
+    def _get_company_currency_cache_dates(self, report, record):
+        """
+        Por qué: Invalidar la caché ante cambios que no tocan el encabezado
+        Tip: Líneas, contacto, compañía (logo/layout), el propio reporte y
+             la última modificación de plantillas QWeb (actualizaciones)
+        """
+        self.env.cr.execute("SELECT max(write_date) FROM ir_ui_view WHERE type = 'qweb'")
+        views_write_date = self.env.cr.fetchone()[0]
+        lines = record[PDF_CACHE_MODELS[report.model]]
+        return [
+            record.write_date,
+            max(lines.mapped('write_date'), default=None),
+            record.partner_id.write_date,
+            record.company_id.write_date,
+            record.company_id.partner_id.write_date,
+            report.write_date,
+            views_write_date,
+        ]
+
+    def _store_company_currency_pdf(self, report, record, cache_key, pdf_content):
+        """
+        Por qué: Guardar PDF renderizado y descartar versiones obsoletas
+        Tip: Se vinculan al reporte (no al documento) para no ensuciar
+             los adjuntos visibles en el chatter
+        """
+        Attachment = self.env['ir.attachment'].sudo()
+        Attachment.search([
+            ('res_model', '=', 'ir.actions.report'),
+            ('res_id', '=', report.id),
+            ('name', '=like', escape_psql(f'{PDF_CACHE_PREFIX}{report.model}_{record.id}_') + '%'),
+        ]).unlink()
+        Attachment.create({
+            'name': cache_key,
+            'raw': pdf_content,
+            'mimetype': 'application/pdf',
+            'res_model': 'ir.actions.report',
+            'res_id': report.id,
+        })
+
+    @api.model
+    def _cron_evict_company_currency_pdf_cache(self):
+        """
+        Por qué: Acotar el almacenamiento ocupado por la caché de PDFs
+        Patrón: Eviction Policy - TTL + límite de cantidad (más antiguos primero)
+        Tip: Parámetros configurables en ir.config_parameter
+        """
+        ICP = self.env['ir.config_parameter'].sudo()
+        ttl_days = int(ICP.get_param('l10n_ar_custom_currency.pdf_cache_ttl_days', 30))
+        max_entries = int(ICP.get_param('l10n_ar_custom_currency.pdf_cache_max_entries', 1000))
+
+        Attachment = self.env['ir.attachment'].sudo()
+        cache_domain = [
+            ('res_model', '=', 'ir.actions.report'),
+            ('name', '=like', escape_psql(PDF_CACHE_PREFIX) + '%'),
+        ]
+
+        expired = Attachment.search(cache_domain + [
+            ('create_date', '<', fields.Datetime.now() - timedelta(days=ttl_days)),
+        ])
+        overflow = Attachment.search(cache_domain, order='create_date desc, id desc', offset=max_entries)
+        to_evict = expired | overflow
+        if to_evict:
+            _logger.info('Evicting %s cached company-currency PDFs', len(to_evict))
+            to_evict.unlink()
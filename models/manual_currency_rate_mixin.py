@@ -0,0 +1,536 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api
+from odoo.tools.sql import column_exists, create_column
+
+_logger = logging.getLogger(__name__)
+
+
+class ManualCurrencyRateMixin(models.AbstractModel):
+    """
+    Por qué: Un solo código para tasa manual en órdenes de venta, compra y facturas
+    Patrón: Mixin + Template Method - la lógica vive aquí, cada documento
+            solo declara su campo de fecha, sus montos y el estilo del chatter
+    Tip: El modelo concreto debe tener currency_id, company_id,
+         company_currency_id y heredar mail.thread
+    """
+    _name = 'manual.currency.rate.mixin'
+    _description = 'Tasa de Cambio Manual (Encabezado)'
+
+    # Por qué: Fecha que define la tasa del sistema cuando no hay tasa manual
+    _manual_rate_date_field = 'date_order'
+
+    # Por qué: Fecha obligatoria a usar mientras la anterior está vacía
+    # Tip: Evita guardar una tasa que depende del día en que se calculó
+    _manual_rate_fallback_date_field = None
+
+    # Por qué: {campo en moneda compañía: campo origen en moneda documento}
+    _company_currency_amount_fields = {}
+
+    # Por qué: Líneas cuyos precios en moneda compañía se calculan diferidos
+    _manual_rate_line_model = None
+
+    # Por qué: Campos del encabezado que cambian la tasa efectiva
+    _manual_rate_trigger_fields = ('manual_currency_rate', 'currency_id', 'company_id')
+
+    manual_currency_rate = fields.Float(
+        string='Tasa de Cambio Manual',
+        digits=(12, 6),
+        help='Tasa de cambio manual a aplicar. Si se completa, '
+             'se usa esta tasa en lugar de la configurada en el sistema.'
+    )
+
+    # Por qué: Mostrar la tasa solo cuando la moneda es diferente a la de la compañía
+    show_manual_rate = fields.Boolean(
+        compute='_compute_show_manual_rate',
+        string='Mostrar Tasa Manual'
+    )
+
+    print_in_company_currency = fields.Boolean(
+        string='Imprimir en Moneda Compañía',
+        default=False,
+        help='Si está marcado, el reporte se imprime en la moneda de la compañía.'
+    )
+
+    # Por qué: Tasa efectiva (manual o sistema) como único valor compartido
+    # Tip: Almacenada; los cambios de tasas del sistema la recalculan
+    # mediante res.currency.rate (ver _recompute_company_currency_amounts).
+    # digits=0 evita redondear tasas chicas (ej. 0.000696 entre compañías)
+    effective_currency_rate = fields.Float(
+        string='Tasa Aplicada',
+        digits=0,
+        compute='_compute_effective_currency_rate',
+        store=True
+    )
+
+    @api.depends('currency_id', 'company_id')
+    def _compute_show_manual_rate(self):
+        """
+        Por qué: Controlar visibilidad del campo de tasa manual
+        Tip: Solo se muestra si hay diferencia de monedas
+        """
+        for record in self:
+            record.show_manual_rate = bool(
+                record.currency_id
+                and record.company_id.currency_id
+                and record.currency_id != record.company_id.currency_id
+            )
+
+    @api.onchange('currency_id')
+    def _onchange_currency_id_manual_rate(self):
+        """
+        Por qué: Limpiar tasa manual al volver a la moneda de la compañía
+        Tip: Evita usar tasa incorrecta de moneda anterior
+        """
+        if self.currency_id == self.company_id.currency_id:
+            self.manual_currency_rate = 0.0
+
+    @api.depends(lambda self: self._get_effective_rate_depends())
+    def _compute_effective_currency_rate(self):
+        """
+        Por qué: Resolver la tasa una sola vez por documento y en lote
+        Patrón: Strategy Pattern - tasa manual o tasa del sistema
+        """
+        rates = self._get_effective_rates()
+        for record in self:
+            record.effective_currency_rate = rates[record.id]
+
+    @api.model
+    def _get_effective_rate_depends(self):
+        return list(self._manual_rate_trigger_fields) + self._get_manual_rate_date_fields()
+
+    @api.model
+    def _get_manual_rate_date_fields(self):
+        return [self._manual_rate_date_field] + (
+            [self._manual_rate_fallback_date_field] if self._manual_rate_fallback_date_field else []
+        )
+
+    @api.model
+    def _get_manual_rate_recompute_domain(self):
+        """
+        Por qué: Documentos a recalcular cuando cambia una tasa del sistema
+        Tip: Cada modelo puede acotar el alcance (ej. solo facturas)
+        """
+        return [('manual_currency_rate', '=', 0)]
+
+    def _get_manual_rate_date(self):
+        """
+        Por qué: Fecha de la tasa del sistema: principal, alternativa y, solo
+                 para documentos aún sin fechas (borradores en pantalla), hoy
+        """
+        self.ensure_one()
+        for field_name in self._get_manual_rate_date_fields():
+            if self[field_name]:
+                return fields.Date.to_date(self[field_name])
+        return fields.Date.today()
+
+    def _get_effective_rates(self):
+        """
+        Por qué: Resolver tasas de muchos documentos en una sola consulta
+        Patrón: Batch Query - agrupa por moneda, compañía y fecha
+        Tip: Los documentos pueden ser de distintas compañías
+        """
+        keys = {}
+        for record in self:
+            if record.manual_currency_rate or not record.currency_id or not record.company_id:
+                continue
+            keys[record.id] = (
+                record.currency_id.id,
+                record.company_id.currency_id.id,
+                record.company_id.id,
+                record._get_manual_rate_date(),
+            )
+
+        system_rates = self.env['res.currency']._get_conversion_rates_batch(keys.values())
+
+        rates = {}
+        for record in self:
+            if record.manual_currency_rate:
+                rates[record.id] = record.manual_currency_rate
+            elif record.id in keys:
+                rates[record.id] = system_rates[keys[record.id]]
+            else:
+                rates[record.id] = 1.0
+        return rates
+
+    def _get_effective_rate(self):
+        """
+        Por qué: Obtener tasa a usar (manual o sistema)
+        Tip: Prioriza tasa manual sobre sistema
+        """
+        self.ensure_one()
+        return self.effective_currency_rate
+
+    @api.depends(lambda self: self._get_company_currency_amount_depends())
+    def _compute_amounts_company_currency(self):
+        """
+        Por qué: Calcular montos en moneda de compañía para reportes
+        Patrón: Adapter Pattern - adaptar montos a otra moneda
+        Tip: Misma moneda copia el monto; si no, aplica la tasa efectiva
+        """
+        for record in self:
+            same_currency = record.currency_id == record.company_id.currency_id
+            factor = record._get_company_currency_sign() * (1.0 if same_currency else record.effective_currency_rate)
+            for target_field, source_field in self._company_currency_amount_fields.items():
+                record[target_field] = record[source_field] * factor
+
+    @api.model
+    def _get_company_currency_amount_depends(self):
+        return list(self._company_currency_amount_fields.values()) + [
+            'currency_id', 'company_id', 'effective_currency_rate'
+        ]
+
+    def _recompute_company_currency_amounts(self):
+        """
+        Por qué: Una tasa del sistema cambió y no es dependencia del ORM
+        Patrón: Batch Recompute - marcar y recalcular todos los documentos juntos
+        Tip: Se marcan solo la tasa efectiva y los montos del encabezado;
+             las líneas son diferidas y basta con invalidar su caché
+        """
+        if not self:
+            return
+        for field_name in ['effective_currency_rate', *self._company_currency_amount_fields]:
+            self.env.add_to_compute(self._fields[field_name], self)
+        self.flush_recordset(['effective_currency_rate', *self._company_currency_amount_fields])
+        if self._manual_rate_line_model:
+            self.env[self._manual_rate_line_model].invalidate_model(
+                ['price_unit_company', 'price_subtotal_company']
+            )
+
+    def _get_company_currency_sign(self):
+        """
+        Por qué: Signo de los montos convertidos (facturas vs notas de crédito)
+        """
+        self.ensure_one()
+        return 1
+
+    @api.model
+    def _get_company_currency_sign_sql(self):
+        """
+        Por qué: Mismo signo que _get_company_currency_sign, para el relleno SQL
+        Tip: La tabla del documento se referencia con el alias doc
+        """
+        return '1'
+
+    def _auto_init(self):
+        """
+        Por qué: Al instalar o actualizar, el ORM recalcularía registro por
+                 registro cada campo almacenado nuevo (millones de facturas)
+        Patrón: SQL Backfill - se crean y completan las columnas antes; el
+                ORM las encuentra existentes y no marca nada para recalcular
+        Tip: Solo la primera vez (si falta effective_currency_rate)
+        """
+        if self._auto and not self._abstract and not column_exists(
+            self.env.cr, self._table, 'effective_currency_rate'
+        ):
+            self._init_company_currency_columns()
+        return super()._auto_init()
+
+    @api.model
+    def _init_company_currency_columns(self):
+        """
+        Por qué: Valores iguales a los que calcularía el ORM, en pocas consultas
+        Patrón: Batch Query - una tasa por (moneda, compañía, fecha) distinta,
+                no por documento
+        Tip: Los campos extra calculados junto a los montos (ej.
+             tax_totals_company) quedan vacíos; quien los lee convierte con
+             la tasa efectiva hasta que el documento se recalcule
+        """
+        cr = self.env.cr
+        table = self._table
+        stored_fields = [
+            field for field in self._fields.values()
+            if field.store and field.compute in (
+                '_compute_effective_currency_rate', '_compute_amounts_company_currency'
+            )
+        ]
+        for field in [self._fields['manual_currency_rate'], *stored_fields]:
+            if not column_exists(cr, table, field.name):
+                create_column(cr, table, field.name, field.column_type[1], field.string)
+
+        # Por qué: Misma prioridad que _get_effective_rates (manual, misma
+        # moneda, tasa del sistema a la primera fecha informada o a hoy)
+        cr.execute(f"""
+            UPDATE "{table}" AS doc
+               SET effective_currency_rate = CASE
+                       WHEN COALESCE(doc.manual_currency_rate, 0) != 0 THEN doc.manual_currency_rate
+                       ELSE 1.0
+                   END
+        """)
+        date_sql = 'COALESCE({}, %s)'.format(', '.join(
+            f'doc."{field_name}"::date' for field_name in self._get_manual_rate_date_fields()
+        ))
+        today = fields.Date.today()
+        cr.execute(f"""
+            SELECT DISTINCT doc.currency_id, company.currency_id, doc.company_id, {date_sql}
+              FROM "{table}" AS doc
+              JOIN res_company company ON company.id = doc.company_id
+             WHERE COALESCE(doc.manual_currency_rate, 0) = 0
+               AND doc.currency_id != company.currency_id
+        """, (today,))
+        rates = self.env['res.currency']._get_conversion_rates_batch(cr.fetchall())
+        if rates:
+            keys = list(rates)
+            cr.execute(f"""
+                UPDATE "{table}" AS doc
+                   SET effective_currency_rate = k.rate
+                  FROM unnest(%s::int[], %s::int[], %s::date[], %s::numeric[])
+                       AS k(currency_id, company_id, date, rate)
+                 WHERE COALESCE(doc.manual_currency_rate, 0) = 0
+                   AND doc.currency_id = k.currency_id
+                   AND doc.company_id = k.company_id
+                   AND {date_sql} = k.date
+            """, (
+                [key[0] for key in keys],
+                [key[2] for key in keys],
+                [key[3] for key in keys],
+                [rates[key] for key in keys],
+                today,
+            ))
+
+        if self._company_currency_amount_fields:
+            # Por qué: Monetary se guarda redondeado a la moneda de la compañía
+            assignments = ', '.join(
+                f"""{target} = ROUND(COALESCE(doc.{source}, 0) * ({self._get_company_currency_sign_sql()})
+                           * CASE WHEN doc.currency_id = currency.id THEN 1.0
+                                  ELSE doc.effective_currency_rate END
+                           / currency.rounding) * currency.rounding"""
+                for target, source in self._company_currency_amount_fields.items()
+            )
+            cr.execute(f"""
+                UPDATE "{table}" AS doc
+                   SET {assignments}
+                  FROM res_company company
+                  JOIN res_currency currency ON currency.id = company.currency_id
+                 WHERE company.id = doc.company_id
+            """)
+        _logger.info('Company currency columns of %s filled in SQL', table)
+
+    def modified(self, fnames, create=False, before=False):
+        """
+        Por qué: Invalidar las líneas diferidas sin recorrerlas
+        Patrón: Observer Pattern - el ORM ya resolvió qué campos dependen del
+                cambio (directo o vía relacionados); si la tasa efectiva quedó
+                por recalcular se vacía la caché de los campos de línea
+        Tip: invalidate_model no depende de la cantidad de líneas
+        """
+        res = super().modified(fnames, create=create, before=before)
+        if self._manual_rate_line_model and not create and (
+            self & self.env.records_to_compute(self._fields['effective_currency_rate'])
+        ):
+            self.env[self._manual_rate_line_model].invalidate_model(
+                ['price_unit_company', 'price_subtotal_company']
+            )
+        return res
+
+    def write(self, vals):
+        """
+        Por qué: Detectar cambio en flag de impresión
+        Patrón: Observer Pattern - notificar cambios relevantes
+        Tip: Comparar valor anterior con nuevo
+        """
+        old_print_flags = {}
+        if 'print_in_company_currency' in vals:
+            old_print_flags = {rec.id: rec.print_in_company_currency for rec in self}
+
+        res = super().write(vals)
+
+        if old_print_flags:
+            self.filtered(
+                lambda rec: old_print_flags[rec.id] != rec.print_in_company_currency
+            )._post_print_mode_message()
+
+        return res
+
+    def _post_currency_rate_messages(self, action_type):
+        """
+        Por qué: Informar en chatter la tasa aplicada a cada documento en moneda extranjera
+        Tip: effective_currency_rate se calcula en lote para todo el prefetch
+        """
+        foreign = self.filtered(lambda rec: rec.currency_id != rec.company_id.currency_id)
+        for record in foreign:
+            record._post_currency_rate_message(action_type)
+
+    def _get_currency_rate_message_style(self, action_type):
+        """
+        Por qué: Cada documento define icono, título y colores de su mensaje
+        Tip: Claves: icon, title, color, bg_color, row_bg_color, subject, footer
+        """
+        self.ensure_one()
+        return {
+            'icon': 'ℹ️',
+            'title': 'Tipo de Cambio',
+            'color': '#6c757d',
+            'bg_color': '#f8f9fa',
+            'row_bg_color': '#f8f9fa',
+            'subject': 'Tipo de Cambio Registrado',
+            'footer': '',
+            'show_date': False,
+        }
+
+    def _post_currency_rate_message(self, action_type='confirm'):
+        """
+        Por qué: Mensaje estético en chatter con información de tasa
+        Patrón: Template Pattern - estructura de mensaje reutilizable
+        Tip: Usar HTML para formato visual atractivo
+        """
+        self.ensure_one()
+
+        style = self._get_currency_rate_message_style(action_type)
+        rate = self._get_effective_rate()
+        rate_source = 'manual' if self.manual_currency_rate else 'sistema'
+        amount_total = abs(self.amount_total)
+
+        date_row = ''
+        if style['show_date']:
+            date_row = f"""
+                <tr>
+                    <td style="padding: 5px; font-weight: bold;">Fecha de referencia:</td>
+                    <td style="padding: 5px;">{self[self._manual_rate_date_field] or 'N/A'}</td>
+                </tr>"""
+
+        # Por qué: HTML permite formato rico y legible
+        message = f"""
+        <div style="padding: 10px; border-left: 4px solid {style['color']}; background-color: {style['bg_color']}; margin: 5px 0;">
+            <h4 style="margin: 0 0 10px 0; color: {style['color']};">
+                {style['icon']} {style['title']} - Tipo de Cambio Aplicado
+            </h4>
+            <table style="width: 100%; border-collapse: collapse;">
+                <tr>
+                    <td style="padding: 5px; font-weight: bold; width: 40%;">Moneda del documento:</td>
+                    <td style="padding: 5px;">{self.currency_id.name} ({self.currency_id.symbol})</td>
+                </tr>
+                <tr>
+                    <td style="padding: 5px; font-weight: bold;">Moneda de la compañía:</td>
+                    <td style="padding: 5px;">{self.company_id.currency_id.name} ({self.company_id.currency_id.symbol})</td>
+                </tr>
+                <tr style="background-color: {style['row_bg_color']};">
+                    <td style="padding: 5px; font-weight: bold;">Tipo de cambio aplicado:</td>
+                    <td style="padding: 5px; font-size: 16px; font-weight: bold; color: {style['color']};">
+                        1 {self.currency_id.name} = {rate:,.6f} {self.company_id.currency_id.name}
+                    </td>
+                </tr>
+                <tr>
+                    <td style="padding: 5px; font-weight: bold;">Origen de la tasa:</td>
+                    <td style="padding: 5px;">
+                        <span style="background-color: {'#ffd700' if rate_source == 'manual' else '#90ee90'};
+                                     padding: 2px 8px; border-radius: 3px; font-weight: bold;">
+                            {rate_source.upper()}
+                        </span>
+                    </td>
+                </tr>{date_row}
+                <tr>
+                    <td style="padding: 5px; font-weight: bold;">Total convertido:</td>
+                    <td style="padding: 5px;">
+                        {amount_total:,.2f} {self.currency_id.symbol} =
+                        <strong>{amount_total * rate:,.2f} {self.company_id.currency_id.symbol}</strong>
+                    </td>
+                </tr>
+            </table>
+            <p style="margin: 10px 0 0 0; font-size: 12px; color: #666; font-style: italic;">
+                {style['footer']}
+            </p>
+        </div>
+        """
+
+        self.message_post(
+            body=message,
+            subject=style['subject'],
+            message_type='notification',
+            subtype_xmlid='mail.mt_note'
+        )
+
+    def _get_print_mode_message_style(self):
+        """
+        Por qué: Cada documento define colores y texto del aviso de impresión
+        Tip: Claves: color, bg_color, company_color, report_label
+        """
+        return {
+            'color': '#875a7b',
+            'bg_color': '#fef5ff',
+            'company_color': '#875a7b',
+            'report_label': 'Los reportes se imprimirán',
+        }
+
+    def _post_print_mode_message(self):
+        """
+        Por qué: Notificar cambio en modo de impresión
+        Tip: Mensaje conciso pero informativo; acepta varios documentos
+        """
+        style = self._get_print_mode_message_style()
+        for record in self:
+            company_currency = record.company_id.currency_id
+            if record.print_in_company_currency:
+                icon = '🖨️'
+                mode = f'<strong style="color: {style["company_color"]};">Moneda de la Compañía ({company_currency.name})</strong>'
+                explanation = f'{style["report_label"]} en {company_currency.name}, ' \
+                              f'aplicando la tasa de cambio configurada.'
+            else:
+                icon = '📄'
+                mode = f'<strong style="color: #875a7b;">Moneda Original ({record.currency_id.name})</strong>'
+                explanation = f'{style["report_label"]} en {record.currency_id.name}, ' \
+                              f'la moneda original del documento.'
+
+            message = f"""
+            <div style="padding: 10px; border-left: 4px solid {style['color']}; background-color: {style['bg_color']}; margin: 5px 0;">
+                <h4 style="margin: 0 0 10px 0; color: {style['color']};">
+                    {icon} Modo de Impresión Modificado
+                </h4>
+                <p style="margin: 5px 0;">
+                    <strong>Nuevo modo:</strong> {mode}
+                </p>
+                <p style="margin: 5px 0; font-size: 12px; color: #666; font-style: italic;">
+                    {explanation}
+                </p>
+            </div>
+            """
+
+            record.message_post(
+                body=message,
+                subject='Modo de Impresión Modificado',
+                message_type='notification',
+                subtype_xmlid='mail.mt_note'
+            )
+
+
+class ManualCurrencyRateLineMixin(models.AbstractModel):
+    """
+    Por qué: Un solo código para precios de línea en moneda compañía
+    Patrón: Mixin + Lazy Evaluation - sin dependencias al encabezado
+    Tip: El encabezado invalida su caché en modified() cuando su tasa
+         efectiva queda por recalcular (incluso vía pricelist_id ->
+         currency_id); se recalculan recién cuando un reporte o vista los lee
+    """
+    _name = 'manual.currency.rate.line.mixin'
+    _description = 'Tasa de Cambio Manual (Línea)'
+
+    # Por qué: Campo Many2one al encabezado que hereda el mixin de encabezado
+    _manual_rate_header_field = 'order_id'
+
+    price_unit_company = fields.Monetary(
+        string='Precio Unitario (Moneda Compañía)',
+        compute='_compute_price_company_currency',
+        currency_field='company_currency_id'
+    )
+    price_subtotal_company = fields.Monetary(
+        string='Subtotal (Moneda Compañía)',
+        compute='_compute_price_company_currency',
+        currency_field='company_currency_id'
+    )
+
+    @api.depends('price_unit', 'price_subtotal')
+    def _compute_price_company_currency(self):
+        """
+        Por qué: Calcular precios en moneda compañía para reportes
+        Tip: La tasa se resuelve en lote a nivel encabezado (prefetch)
+        """
+        for line in self:
+            header = line[self._manual_rate_header_field]
+            if header.currency_id == header.company_id.currency_id:
+                line.price_unit_company = line.price_unit
+                line.price_subtotal_company = line.price_subtotal
+            else:
+                rate = header.effective_currency_rate
+                line.price_unit_company = line.price_unit * rate
+                line.price_subtotal_company = line.price_subtotal * rate
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+PARAM_RATE_WARMUP = 'l10n_ar_custom_currency.rate_warmup_enabled'
+
+# Por qué: Evitar que la caché de tasas del proceso crezca sin límite
+RATE_CACHE_MAX_ENTRIES = 20000
+
+
+class ResCurrency(models.Model):
+    _inherit = 'res.currency'
+
+    @api.model
+    def _get_conversion_rates_batch(self, keys):
+        """
+        Por qué: Resolver tasas de muchos documentos (y compañías) en una sola consulta
+        Patrón: Batch Query - reemplaza N llamadas a _get_conversion_rate
+        Tip: keys es un iterable de tuplas
+             (from_currency_id, to_currency_id, company_id, date)
+             y se devuelve {key: tasa} con la misma semántica que
+             _get_conversion_rate (to_rate / from_rate)
+        """
+        keys = set(keys)
+        if not keys:
+            return {}
+
+        companies = self.env['res.company'].browse({key[2] for key in keys})
+        root_by_company = {company.id: company.root_id.id for company in companies}
+
+        # Por qué: Una fila por (moneda, compañía raíz, fecha) distinta
+        lookups = set()
+        for from_currency_id, to_currency_id, company_id, date in keys:
+            lookup_date = fields.Date.to_date(date)
+            root_id = root_by_company[company_id]
+            lookups.add((from_currency_id, root_id, lookup_date))
+            lookups.add((to_currency_id, root_id, lookup_date))
+
+        rates = self._get_rates_batch(lookups)
+
+        result = {}
+        for key in keys:
+            from_currency_id, to_currency_id, company_id, date = key
+            lookup_date = fields.Date.to_date(date)
+            root_id = root_by_company[company_id]
+            result[key] = (
+                rates[(to_currency_id, root_id, lookup_date)]
+                / rates[(from_currency_id, root_id, lookup_date)]
+            )
+        return result
+
+    @tools.ormcache()
+    def _get_rate_cache(self):
+        """
+        Por qué: Tasas ya resueltas compartidas entre requests del mismo worker
+        Patrón: Process Cache - dict mutable guardado en el ormcache del registry
+        Tip: Se vacía con registry.clear_cache() al cambiar una tasa, lo que
+             también invalida la caché de los demás workers
+        """
+        return {}
+
+    @api.model
+    def _get_rates_batch(self, lookups):
+        """
+        Por qué: Equivalente a _get_rates para muchas (moneda, compañía, fecha)
+        Patrón: Cache-Aside - solo se consultan las claves que faltan
+        Tip: El resultado se arma en un dict local; la caché compartida puede
+             vaciarse en cualquier momento (límite u otro hilo)
+        """
+        cache = self._get_rate_cache()
+        found = {}
+        missing = []
+        for lookup in set(lookups):
+            rate = cache.get(lookup)
+            if rate is None:
+                missing.append(lookup)
+            else:
+                found[lookup] = rate
+        if missing:
+            queried = self._query_rates_batch(missing)
+            found.update(queried)
+            if len(cache) + len(queried) > RATE_CACHE_MAX_ENTRIES:
+                cache.clear()
+            cache.update(queried)
+        return found
+
+    @api.model
+    def _query_rates_batch(self, lookups):
+        """
+        Por qué: Resolver en una sola consulta, sin caché
+        Tip: Misma prioridad que el nativo: tasa de la compañía antes que la
+             global, última tasa <= fecha y, si no existe, la primera cargada
+        """
+        lookups = list(lookups)
+        if not lookups:
+            return {}
+
+        self.env['res.currency.rate'].flush_model(['rate', 'currency_id', 'company_id', 'name'])
+        self.env.cr.execute("""
+            SELECT k.currency_id, k.company_id, k.date,
+                   COALESCE(
+                       (SELECT r.rate FROM res_currency_rate r
+                         WHERE r.currency_id = k.currency_id
+                           AND r.name <= k.date
+                           AND (r.company_id IS NULL OR r.company_id = k.company_id)
+                      ORDER BY r.company_id, r.name DESC
+                         LIMIT 1),
+                       (SELECT r.rate FROM res_currency_rate r
+                         WHERE r.currency_id = k.currency_id
+                           AND (r.company_id IS NULL OR r.company_id = k.company_id)
+                      ORDER BY r.company_id, r.name ASC
+                         LIMIT 1),
+                       1.0
+                   ) AS rate
+              FROM unnest(%s::int[], %s::int[], %s::date[]) AS k(currency_id, company_id, date)
+        """, (
+            [lookup[0] for lookup in lookups],
+            [lookup[1] for lookup in lookups],
+            [lookup[2] for lookup in lookups],
+        ))
+        return {
+            (currency_id, company_id, date): rate
+            for currency_id, company_id, date, rate in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _warm_up_rate_cache(self):
+        """
+        Por qué: Que el primer request tras reiniciar un worker no pague la
+                 carga de tasas y metadatos de monedas
+        Patrón: Cache Warm-up - tasas del día de monedas extranjeras activas
+                para todas las compañías, en una sola consulta
+        Tip: La caché de registros del ORM es por transacción; lo que persiste
+             es la caché de tasas del proceso, la caché de permisos y los
+             buffers de PostgreSQL
+        """
+        companies = self.env['res.company'].sudo().search([])
+        currencies = self.sudo().search([])
+        for model_name in ('res.currency', 'res.currency.rate', 'res.company'):
+            self.env[model_name].check_access_rights('read', raise_exception=False)
+
+        today = fields.Date.context_today(self)
+        keys = [
+            (currency.id, company.currency_id.id, company.id, today)
+            for company in companies
+            for currency in currencies
+            if currency != company.currency_id
+        ]
+        self._get_conversion_rates_batch(keys)
+        _logger.info(
+            'Currency rate cache warmed up: %s currencies, %s companies',
+            len(currencies), len(companies)
+        )
+
+    @api.model
+    def _cron_warm_up_rate_cache(self):
+        """
+        Por qué: Ping liviano que mantiene caliente la caché y la base
+        """
+        self._warm_up_rate_cache()
+
+    def _register_hook(self):
+        """
+        Por qué: Precargar tasas al cargar el registry (opcional)
+        Tip: Se activa con el parámetro rate_warmup_enabled; un error nunca
+             debe impedir la carga del registry
+        """
+        super()._register_hook()
+        try:
+            with self.env.cr.savepoint():
+                if tools.str2bool(self.env['ir.config_parameter'].sudo().get_param(PARAM_RATE_WARMUP, 'False')):
+                    self._warm_up_rate_cache()
+        except Exception:
+            _logger.warning('Currency rate warm-up failed', exc_info=True)
+
+    @api.model
+    def _convert_amounts_batch(self, conversions):
+        """
+        Por qué: Convertir miles de montos a moneda compañía en una sola pasada
+        Patrón: Batch Query - tasas de documentos y del sistema en lote
+        Tip: Cada conversión es un dict con amount, currency (código ISO o id),
+             company_id, date y opcionalmente document {model, id}. Si hay
+             documento se usa su tasa efectiva (manual primero, luego sistema)
+             y su compañía. Los errores se informan por ítem sin cortar el lote
+        """
+        results = [None] * len(conversions)
+
+        # Por qué: Un ítem mal formado no debe cortar el lote
+        valid = {}
+        for index, conv in enumerate(conversions):
+            error = self._validate_conversion_item(conv)
+            if error:
+                results[index] = {'error': error}
+            else:
+                valid[index] = conv
+
+        # Por qué: Resolver códigos ISO de todas las monedas en una búsqueda
+        codes = {
+            conv.get('currency') for conv in valid.values()
+            if isinstance(conv.get('currency'), str)
+        }
+        currency_by_code = {
+            currency.name: currency
+            for currency in self.with_context(active_test=False).search([('name', 'in', list(codes))])
+        } if codes else {}
+
+        documents = {}
+        system_keys = {}
+        companies = self.env['res.company'].browse({
+            conv.get('company_id') for conv in valid.values()
+            if isinstance(conv.get('company_id'), int)
+        }).exists()
+        company_by_id = {company.id: company for company in companies}
+        allowed_company_ids = set(self.env.user.company_ids.ids)
+
+        for index, conv in valid.items():
+            document = conv.get('document')
+            if document:
+                model_name = document.get('model')
+                if not isinstance(model_name, str) or model_name not in self.env or not isinstance(
+                    self.env[model_name], self.pool['manual.currency.rate.mixin']
+                ) or not self.env[model_name].check_access_rights('read', raise_exception=False):
+                    results[index] = {'error': f'Modelo no soportado: {model_name}'}
+                    continue
+                if not isinstance(document.get('id'), int):
+                    results[index] = {'error': 'Id de documento inválido'}
+                    continue
+                documents.setdefault(model_name, []).append((index, document.get('id')))
+                continue
+
+            currency = conv.get('currency')
+            if isinstance(currency, str):
+                currency = currency_by_code.get(currency)
+            else:
+                currency = self.browse(currency).exists() if isinstance(currency, int) else None
+            company = company_by_id.get(conv.get('company_id'))
+            if not currency or not company:
+                results[index] = {'error': 'Moneda o compañía inválida'}
+                continue
+            if company.id not in allowed_company_ids:
+                results[index] = {'error': 'Compañía no permitida'}
+                continue
+            system_keys[index] = (
+                currency.id,
+                company.currency_id.id,
+                company.id,
+                fields.Date.to_date(conv.get('date') or fields.Date.today()),
+            )
+
+        system_rates = self._get_conversion_rates_batch(system_keys.values())
+        for index, key in system_keys.items():
+            currency = self.browse(key[0])
+            company_currency = self.browse(key[1])
+            results[index] = self._prepare_conversion_result(
+                conversions[index].get('amount') or 0.0, currency, company_currency,
+                system_rates[key], 'system'
+            )
+
+        # Por qué: Un browse + una resolución de tasas por modelo de documento
+        for model_name, items in documents.items():
+            records = self.env[model_name].browse(
+                [doc_id for _index, doc_id in items]
+            ).exists()._filter_access_rules('read')
+            rates = records._get_effective_rates()
+            records_by_id = {record.id: record for record in records}
+            for index, doc_id in items:
+                record = records_by_id.get(doc_id)
+                if not record:
+                    results[index] = {'error': f'Documento no encontrado: {model_name},{doc_id}'}
+                    continue
+                results[index] = self._prepare_conversion_result(
+                    conversions[index].get('amount') or 0.0, record.currency_id,
+                    record.company_id.currency_id, rates[record.id],
+                    'manual' if record.manual_currency_rate else 'system'
+                )
+
+        return results
+
+    @api.model
+    def _validate_conversion_item(self, conv):
+        """
+        Por qué: Validar tipos de cada ítem antes de procesar el lote
+        Tip: Devuelve el mensaje de error o None si el ítem es válido
+        """
+        if not isinstance(conv, dict):
+            return 'Conversión inválida: se espera un objeto'
+        amount = conv.get('amount')
+        if amount is not None and (isinstance(amount, bool) or not isinstance(amount, (int, float))):
+            return 'Monto inválido'
+        if not isinstance(conv.get('company_id'), (int, type(None))):
+            return 'Compañía inválida'
+        if not isinstance(conv.get('currency'), (str, int, type(None))):
+            return 'Moneda inválida'
+        document = conv.get('document')
+        if document is not None and not isinstance(document, dict):
+            return 'Documento inválido: se espera {model, id}'
+        if not document and conv.get('date'):
+            try:
+                fields.Date.to_date(conv['date'])
+            except (TypeError, ValueError):
+                return f"Fecha inválida: {conv['date']}"
+        return None
+
+    @api.model
+    def _prepare_conversion_result(self, amount, currency, company_currency, rate, rate_source):
+        """
+        Por qué: Formato único de respuesta por conversión
+        """
+        if currency == company_currency:
+            rate = 1.0
+        return {
+            'amount': amount,
+            'currency': currency.name,
+            'company_currency': company_currency.name,
+            'rate': rate,
+            'rate_source': rate_source,
+            'amount_converted': company_currency.round(amount * rate),
+        }
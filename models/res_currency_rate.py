@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+from odoo import models, api
+from odoo.exceptions import UserError
+from odoo.osv import expression
+
+_logger = logging.getLogger(__name__)
+
+
+class ResCurrencyRate(models.Model):
+    _inherit = 'res.currency.rate'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """
+        Por qué: Una tasa nueva cambia la tasa efectiva de documentos sin tasa manual
+        Patrón: Dependency Tracker - recalcular solo los documentos afectados
+        """
+        rates = super().create(vals_list)
+        self.env.registry.clear_cache()
+        rates._recompute_affected_documents(rates._get_affected_windows())
+        return rates
+
+    def write(self, vals):
+        """
+        Por qué: Al editar una tasa cambian la ventana anterior y la nueva
+        Tip: Se toman ambas para cubrir cambios de fecha, moneda o compañía
+        """
+        windows = self._get_affected_windows()
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        self._recompute_affected_documents(windows + self._get_affected_windows())
+        return res
+
+    def unlink(self):
+        """
+        Por qué: Al borrar una tasa su ventana pasa a usar la tasa anterior
+        """
+        windows = self._get_affected_windows()
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        self._recompute_affected_documents(windows)
+        return res
+
+    def _get_affected_windows(self):
+        """
+        Por qué: Rango de fechas en que cada tasa es la vigente
+        Patrón: Batch Query - vecinos de todas las tasas en una consulta
+        Tip: Devuelve tuplas (currency_id, company_id, date_from, date_to);
+             date_from es None si es la primera tasa (se usa como fallback
+             para fechas anteriores) y date_to es None si es la última
+        """
+        if not self:
+            return []
+        self.flush_recordset(['name', 'currency_id', 'company_id'])
+        self.env.cr.execute("""
+            SELECT id, currency_id, company_id, name, prev_name, next_name
+              FROM (
+                    SELECT id, currency_id, company_id, name,
+                           LAG(name) OVER w AS prev_name,
+                           LEAD(name) OVER w AS next_name
+                      FROM res_currency_rate
+                     WHERE currency_id = ANY(%s)
+                    WINDOW w AS (PARTITION BY currency_id, company_id ORDER BY name)
+                   ) neighbours
+             WHERE id = ANY(%s)
+        """, (list(set(self.currency_id.ids)), self.ids))
+        return [
+            (currency_id, company_id, name if prev_name else None, next_name)
+            for _id, currency_id, company_id, name, prev_name, next_name in self.env.cr.fetchall()
+        ]
+
+    @api.model
+    def _recompute_affected_documents(self, windows):
+        """
+        Por qué: Mantener al día los montos en moneda compañía almacenados
+        Patrón: Dependency Tracker - por moneda, compañía y ventana de fechas
+        Tip: Solo documentos sin tasa manual (ver _get_manual_rate_recompute_domain);
+             una búsqueda y un recálculo en lote por modelo que hereda el mixin.
+             Los documentos sin ninguna fecha no guardan una tasa del día
+        """
+        if not windows:
+            return
+
+        company_currency_ids = set(self.env['res.company'].sudo().search([]).currency_id.ids)
+        mixin_models = self.env.registry['manual.currency.rate.mixin']._inherit_children
+
+        for model_name in mixin_models:
+            Model = self.env[model_name].sudo()
+            if Model._abstract:
+                continue
+            date_fields = Model._get_manual_rate_date_fields()
+            window_domains = []
+            for currency_id, company_id, date_from, date_to in windows:
+                domain = []
+                # Por qué: Si cambia la tasa de una moneda de compañía cambian
+                # todas las conversiones de esa compañía
+                if currency_id not in company_currency_ids:
+                    domain.append(('currency_id', '=', currency_id))
+                if company_id:
+                    domain.append(('company_id', 'child_of', company_id))
+
+                # Por qué: Cada fecha alternativa aplica solo si las
+                # anteriores están vacías
+                date_domains = []
+                for index, date_field in enumerate(date_fields):
+                    date_domain = [(previous, '=', False) for previous in date_fields[:index]]
+                    if date_from:
+                        date_domain.append((date_field, '>=', date_from))
+                    if date_to:
+                        date_domain.append((date_field, '<', date_to))
+                    date_domains.append(date_domain or [(1, '=', 1)])
+                window_domains.append(expression.AND([domain, expression.OR(date_domains)]))
+
+            records = Model.search(expression.AND([
+                Model._get_manual_rate_recompute_domain(),
+                expression.OR(window_domains),
+            ]))
+            records._recompute_company_currency_amounts()
+
+    @api.model
+    def _compact_rate_history(self, currency_ids=None, dry_run=False):
+        """
+        Por qué: Feeds diarios repiten la misma tasa; el historial crece sin aportar
+        Patrón: Change-Point Compaction - se borra cada fila igual a la anterior
+                de su misma (moneda, compañía)
+        Tip: Resultado idéntico para cualquier fecha: la búsqueda toma la última
+             fila <= fecha de la partición y la primera fila nunca se borra.
+             Se verifica comparando todas las tasas antes y después; en dry run
+             (o si algo difiere) se revierte el savepoint
+        """
+        self.flush_model()
+        currency_ids = list(currency_ids or [])
+        currency_filter = 'WHERE currency_id = ANY(%s)' if currency_ids else ''
+        params = [currency_ids] if currency_ids else []
+
+        self.env.cr.execute(f"SELECT count(*) FROM res_currency_rate {currency_filter}", params)
+        rows_before = self.env.cr.fetchone()[0]
+
+        lookups = self._get_compaction_lookups(currency_ids)
+        Currency = self.env['res.currency']
+        started = time.perf_counter()
+        rates_before = Currency._query_rates_batch(lookups)
+        lookup_before = time.perf_counter() - started
+
+        with self.env.cr.savepoint(flush=False) as savepoint:
+            self.env.cr.execute(f"""
+                DELETE FROM res_currency_rate
+                 WHERE id IN (
+                        SELECT id
+                          FROM (
+                                SELECT id, rate,
+                                       LAG(rate) OVER (
+                                           PARTITION BY currency_id, company_id ORDER BY name
+                                       ) AS prev_rate
+                                  FROM res_currency_rate
+                                  {currency_filter}
+                               ) history
+                         WHERE rate = prev_rate
+                       )
+            """, params)
+            rows_removed = self.env.cr.rowcount
+            self.invalidate_model()
+
+            started = time.perf_counter()
+            rates_after = Currency._query_rates_batch(lookups)
+            lookup_after = time.perf_counter() - started
+
+            mismatches = [key for key, rate in rates_before.items() if rates_after.get(key) != rate]
+            if dry_run or mismatches:
+                savepoint.rollback()
+                self.invalidate_model()
+
+        if mismatches:
+            raise UserError(
+                f'La compactación cambiaría {len(mismatches)} tasas; no se aplicaron cambios.'
+            )
+        if not dry_run and rows_removed:
+            self.env.registry.clear_cache()
+
+        result = {
+            'rows_before': rows_before,
+            'rows_removed': rows_removed,
+            'rows_after': rows_before - rows_removed,
+            'lookup_count': len(lookups),
+            'lookup_before_ms': lookup_before * 1000,
+            'lookup_after_ms': lookup_after * 1000,
+            'dry_run': dry_run,
+        }
+        _logger.info('Currency rate history compaction: %s', result)
+        return result
+
+    @api.model
+    def _get_compaction_lookups(self, currency_ids):
+        """
+        Por qué: Verificar y medir la compactación en cada punto de cambio
+        Tip: Toda fecha con tasa × compañía raíz, más la compañía ficticia 0
+             que solo ve tasas globales
+        """
+        currency_filter = 'WHERE currency_id = ANY(%s)' if currency_ids else ''
+        self.env.cr.execute(
+            f"SELECT DISTINCT currency_id, name FROM res_currency_rate {currency_filter}",
+            [currency_ids] if currency_ids else [],
+        )
+        rows = self.env.cr.fetchall()
+        root_ids = self.env['res.company'].sudo().search([('parent_id', '=', False)]).ids + [0]
+        return [
+            (currency_id, root_id, date)
+            for currency_id, date in rows
+            for root_id in root_ids
+        ]
+
+    @api.model
+    def _cron_compact_rate_history(self):
+        """
+        Por qué: Mantenimiento periódico opcional (cron inactivo por defecto)
+        """
+        self._compact_rate_history()
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Por qué: Medir contención al confirmar/validar documentos con tasa manual en paralelo
+Patrón: Load Harness - N hilos, cada uno con su propio cursor PostgreSQL
+Tip: No es parte del módulo instalado; se ejecuta contra una base local:
+
+    python scripts/stress_concurrency.py -c /etc/odoo.conf -d stress_db \\
+        --workers 8 --docs 25 --kind all
+
+Reporta throughput, esperas de locks (muestreando pg_locks) y
+reintentos por errores de serialización, para comparar antes/después de
+cada corrección de contención. Los documentos creados llevan la referencia
+STRESS-<corrida> para poder identificarlos.
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import psycopg2.errors
+
+import odoo
+from odoo import api, SUPERUSER_ID
+
+# Por qué: Errores que PostgreSQL resuelve reintentando la transacción
+RETRYABLE_ERRORS = (
+    psycopg2.errors.SerializationFailure,
+    psycopg2.errors.DeadlockDetected,
+    psycopg2.errors.LockNotAvailable,
+)
+
+ACTIONS = {
+    'sale': ('sale.order', 'action_confirm'),
+    'purchase': ('purchase.order', 'button_confirm'),
+    'invoice': ('account.move', 'action_post'),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-c', '--config', help='Archivo de configuración de Odoo')
+    parser.add_argument('-d', '--database', required=True, help='Base de datos local de pruebas')
+    parser.add_argument('--workers', type=int, default=4, help='Hilos concurrentes')
+    parser.add_argument('--docs', type=int, default=20, help='Documentos por hilo y tipo')
+    parser.add_argument('--lines', type=int, default=5, help='Líneas por documento')
+    parser.add_argument('--kind', choices=['sale', 'purchase', 'invoice', 'all'], default='all')
+    parser.add_argument('--currency', default='USD', help='Moneda extranjera de los documentos')
+    parser.add_argument('--rate', type=float, default=1050.0, help='Tasa manual a aplicar')
+    parser.add_argument('--max-retries', type=int, default=5)
+    parser.add_argument('--sample-interval', type=float, default=0.05, help='Segundos entre muestras de locks')
+    return parser.parse_args()
+
+
+class LockSampler(threading.Thread):
+    """
+    Por qué: Observar esperas de locks sin instrumentar el ORM
+    Tip: Usa una conexión propia fuera del pool de los workers
+    """
+
+    def __init__(self, registry, dbname, interval):
+        super().__init__(daemon=True)
+        self.registry = registry
+        self.dbname = dbname
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.samples = 0
+        self.waiting_samples = 0
+        self.max_waiting = 0
+        self.waits_by_relation = Counter()
+
+    def run(self):
+        with self.registry.cursor() as cr:
+            while not self.stop_event.is_set():
+                cr.execute("""
+                    SELECT COALESCE(c.relname, l.locktype)
+                      FROM pg_locks l
+                      JOIN pg_stat_activity a ON a.pid = l.pid
+                 LEFT JOIN pg_class c ON c.oid = l.relation
+                     WHERE NOT l.granted AND a.datname = %s
+                """, (self.dbname,))
+                waiting = [row[0] for row in cr.fetchall()]
+                cr.rollback()
+                self.samples += 1
+                if waiting:
+                    self.waiting_samples += 1
+                    self.max_waiting = max(self.max_waiting, len(waiting))
+                    self.waits_by_relation.update(waiting)
+                time.sleep(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def prepare_documents(registry, args, run_ref):
+    """
+    Por qué: Crear los documentos en borrador antes de medir
+    Tip: Se reparten por hilo para que cada worker procese los suyos
+    """
+    kinds = list(ACTIONS) if args.kind == 'all' else [args.kind]
+    plan = defaultdict(list)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        currency = env['res.currency'].with_context(active_test=False).search(
+            [('name', '=', args.currency)], limit=1
+        )
+        currency.active = True
+        company = env.company
+        partner = env['res.partner'].create({'name': f'Stress Partner {run_ref}'})
+        product = env['product.product'].create({
+            'name': f'Stress Product {run_ref}',
+            'list_price': 10.0,
+            'standard_price': 8.0,
+        })
+        line_vals = [{
+            'product_id': product.id,
+            'name': product.name,
+            'price_unit': 10.0 + index,
+        } for index in range(args.lines)]
+
+        for worker in range(args.workers):
+            for kind in kinds:
+                for doc_index in range(args.docs):
+                    ref = f'STRESS-{run_ref}-{worker}-{doc_index}'
+                    if kind == 'sale':
+                        record = env['sale.order'].create({
+                            'partner_id': partner.id,
+                            'client_order_ref': ref,
+                            'currency_id': currency.id,
+                            'manual_currency_rate': args.rate,
+                            'order_line': [(0, 0, dict(vals, product_uom_qty=1.0)) for vals in line_vals],
+                        })
+                    elif kind == 'purchase':
+                        record = env['purchase.order'].create({
+                            'partner_id': partner.id,
+                            'partner_ref': ref,
+                            'currency_id': currency.id,
+                            'manual_currency_rate': args.rate,
+                            'order_line': [(0, 0, dict(vals, product_qty=1.0)) for vals in line_vals],
+                        })
+                    else:
+                        record = env['account.move'].create({
+                            'move_type': 'out_invoice',
+                            'partner_id': partner.id,
+                            'ref': ref,
+                            'currency_id': currency.id,
+                            'company_id': company.id,
+                            'manual_currency_rate': args.rate,
+                            'invoice_line_ids': [(0, 0, dict(vals, quantity=1.0)) for vals in line_vals],
+                        })
+                    plan[worker].append((kind, record.id))
+        cr.commit()
+    return plan
+
+
+def run_worker(registry, worker_plan, args, stats, lock):
+    """
+    Por qué: Confirmar/validar documentos en su propia transacción
+    Tip: Un commit por documento, igual que un usuario desde la interfaz
+    """
+    random.shuffle(worker_plan)
+    for kind, record_id in worker_plan:
+        model_name, method_name = ACTIONS[kind]
+        for attempt in range(args.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {})
+                    getattr(env[model_name].browse(record_id), method_name)()
+                elapsed = time.perf_counter() - started
+                with lock:
+                    stats['durations'][kind].append(elapsed)
+                break
+            except RETRYABLE_ERRORS as error:
+                with lock:
+                    stats['retries'][kind] += 1
+                    stats['retry_errors'][type(error).__name__] += 1
+                time.sleep(random.uniform(0.01, 0.05) * (attempt + 1))
+            except Exception as error:
+                # Por qué: Un error no reintentable no debe matar el hilo ni
+                # dejar sin procesar el resto de sus documentos
+                with lock:
+                    stats['failures'][kind] += 1
+                    stats['failure_errors'][type(error).__name__] += 1
+                break
+        else:
+            with lock:
+                stats['failures'][kind] += 1
+
+
+def print_report(stats, sampler, wall_time):
+    print('\n=== Resultado de la prueba de concurrencia ===')
+    print(f'Tiempo total: {wall_time:.2f}s')
+    total_ops = sum(len(durations) for durations in stats['durations'].values())
+    print(f'Operaciones completadas: {total_ops} ({total_ops / wall_time:.1f} ops/s)')
+    for kind, durations in sorted(stats['durations'].items()):
+        if not durations:
+            continue
+        p95 = sorted(durations)[max(int(len(durations) * 0.95) - 1, 0)]
+        print(
+            f'  {kind:<9} n={len(durations):<5} media={statistics.mean(durations) * 1000:8.1f}ms '
+            f'p95={p95 * 1000:8.1f}ms reintentos={stats["retries"][kind]} fallas={stats["failures"][kind]}'
+        )
+    print(f'Reintentos por error: {dict(stats["retry_errors"])}')
+    print(f'Fallas por error: {dict(stats["failure_errors"])}')
+    ratio = sampler.waiting_samples / sampler.samples if sampler.samples else 0.0
+    print(
+        f'Esperas de lock: {sampler.waiting_samples}/{sampler.samples} muestras ({ratio:.1%}), '
+        f'máximo simultáneo {sampler.max_waiting}'
+    )
+    for relation, count in sampler.waits_by_relation.most_common(10):
+        print(f'  {relation:<30} {count}')
+
+
+def main():
+    args = parse_args()
+    config_args = ['-d', args.database]
+    if args.config:
+        config_args = ['-c', args.config] + config_args
+    odoo.tools.config.parse_config(config_args)
+    registry = odoo.registry(args.database)
+
+    run_ref = uuid.uuid4().hex[:8]
+    plan = prepare_documents(registry, args, run_ref)
+
+    stats = {
+        'durations': defaultdict(list),
+        'retries': Counter(),
+        'failures': Counter(),
+        'retry_errors': Counter(),
+        'failure_errors': Counter(),
+    }
+    lock = threading.Lock()
+    sampler = LockSampler(registry, args.database, args.sample_interval)
+    threads = [
+        threading.Thread(target=run_worker, args=(registry, plan[worker], args, stats, lock))
+        for worker in range(args.workers)
+    ]
+
+    sampler.start()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - started
+    sampler.stop()
+
+    print(f'Corrida STRESS-{run_ref}')
+    print_report(stats, sampler, wall_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+from . import test_l10n_ar_currency_rate
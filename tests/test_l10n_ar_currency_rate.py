@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from odoo.addons.l10n_ar.tests.common import TestAr
+
+
+class AfipWsfeStandIn:
+    """
+    Por qué: Reemplazo local del web service de AFIP (WSFEv1) para tests
+    Tip: Arma el mismo dato que se enviaría en FECAESolicitar (MonId /
+         MonCotiz) y rechaza cotizaciones vacías o fuera de tolerancia
+         respecto de una cotización de referencia, como hace AFIP
+    """
+
+    def __init__(self, reference_rates, tolerance=0.1):
+        self.reference_rates = reference_rates
+        self.tolerance = tolerance
+        self.requests = []
+
+    def submit(self, invoices):
+        results = {}
+        for invoice in invoices:
+            request = {
+                'MonId': invoice.currency_id.name,
+                'MonCotiz': invoice.l10n_ar_currency_rate,
+            }
+            self.requests.append(request)
+            reference = self.reference_rates[invoice.currency_id.name]
+            if not request['MonCotiz']:
+                results[invoice.id] = 'R'
+            elif abs(request['MonCotiz'] - reference) / reference > self.tolerance:
+                results[invoice.id] = 'R'
+            else:
+                results[invoice.id] = 'A'
+        return results
+
+
+@tagged('post_install_l10n', 'post_install', '-at_install')
+class TestL10nArCurrencyRate(TestAr):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.currency_usd = cls.env.ref('base.USD')
+        cls.currency_usd.active = True
+        cls.rate_date = fields.Date.from_string('2024-01-10')
+        cls.env['res.currency.rate'].create({
+            'name': cls.rate_date,
+            'currency_id': cls.currency_usd.id,
+            'company_id': cls.company_ri.id,
+            'inverse_company_rate': 1000.0,
+        })
+
+    def setUp(self):
+        super().setUp()
+        # Por qué: Un stand-in por test para no compartir los pedidos registrados
+        self.afip = AfipWsfeStandIn({'USD': 1000.0})
+
+    def _create_usd_invoice(self, manual_rate=0.0):
+        return self.env['account.move'].create({
+            'move_type': 'out_invoice',
+            'partner_id': self.res_partner_adhoc.id,
+            'journal_id': self.journal.id,
+            'company_id': self.company_ri.id,
+            'currency_id': self.currency_usd.id,
+            'invoice_date': self.rate_date,
+            'manual_currency_rate': manual_rate,
+            'invoice_line_ids': [(0, 0, {
+                'product_id': self.product_a.id,
+                'quantity': 1.0,
+                'price_unit': 100.0,
+            })],
+        })
+
+    def test_manual_rate_handed_off(self):
+        invoices = self._create_usd_invoice(manual_rate=1050.0) | self._create_usd_invoice(manual_rate=1050.0)
+        invoices.action_post()
+
+        self.assertEqual(invoices.mapped('l10n_ar_currency_rate'), [1050.0, 1050.0])
+        self.assertEqual(set(self.afip.submit(invoices).values()), {'A'})
+        self.assertEqual(self.afip.requests[0], {'MonId': 'USD', 'MonCotiz': 1050.0})
+
+    def test_frozen_effective_rate(self):
+        invoice = self._create_usd_invoice()
+        invoice.action_post()
+        self.assertAlmostEqual(invoice.l10n_ar_currency_rate, 1000.0, places=6)
+
+        # Por qué: Una tasa posterior no cambia la tasa de una factura validada
+        self.env['res.currency.rate'].search([
+            ('currency_id', '=', self.currency_usd.id),
+            ('name', '=', self.rate_date),
+            ('company_id', '=', self.company_ri.id),
+        ]).inverse_company_rate = 1200.0
+
+        self.assertAlmostEqual(invoice.effective_currency_rate, 1000.0, places=6)
+        self.assertAlmostEqual(invoice.l10n_ar_currency_rate, 1000.0, places=6)
+        self.assertFalse(invoice._check_l10n_ar_currency_rates())
+        self.assertEqual(self.afip.submit(invoice)[invoice.id], 'A')
+
+    def test_validator_issues(self):
+        clean = self._create_usd_invoice(manual_rate=1020.0)
+        mismatch = self._create_usd_invoice(manual_rate=1050.0)
+        deviated = self._create_usd_invoice(manual_rate=1500.0)
+        invoices = clean | mismatch | deviated
+        invoices.action_post()
+        mismatch.l10n_ar_currency_rate = 990.0
+
+        issues = invoices._check_l10n_ar_currency_rates()
+        self.assertEqual(self.env['account.move'].union(*[move for move, _message in issues]), mismatch | deviated)
+        self.assertEqual(self.afip.submit(deviated)[deviated.id], 'R')
+
+        with self.assertRaises(UserError):
+            invoices.action_l10n_ar_validate_currency_rates()
+        action = clean.action_l10n_ar_validate_currency_rates()
+        self.assertEqual(action['params']['type'], 'success')
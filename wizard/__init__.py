@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+from . import currency_exposure
+from . import account_payment_register
+from . import currency_rate_simulation
+from . import currency_rate_compaction
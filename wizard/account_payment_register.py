@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+
+class AccountPaymentRegister(models.TransientModel):
+    _inherit = 'account.payment.register'
+
+    # Por qué: Registrar el pago con la misma tasa manual de las facturas
+    manual_currency_rate = fields.Float(
+        string='Tasa de Cambio Manual',
+        digits=(12, 6),
+        compute='_compute_manual_currency_rate',
+        store=True,
+        readonly=False,
+        help='Tasa heredada de las facturas a pagar. Si todas comparten la misma '
+             'tasa manual, el pago se registra con ella y la conciliación no '
+             'genera diferencia de cambio.'
+    )
+
+    @api.depends('line_ids', 'currency_id')
+    def _compute_manual_currency_rate(self):
+        """
+        Por qué: Proponer la tasa manual común de las facturas seleccionadas
+        Tip: Si las facturas tienen tasas distintas no se propone ninguna
+        """
+        for wizard in self:
+            wizard.manual_currency_rate = wizard._get_common_manual_rate(
+                wizard.line_ids.move_id, wizard.currency_id
+            )
+
+    @api.model
+    def _get_common_manual_rate(self, moves, currency):
+        """
+        Por qué: Tasa manual compartida por un conjunto de facturas
+        Tip: Devuelve 0.0 si no hay tasa única o la moneda no coincide
+        """
+        rates = set(moves.mapped('manual_currency_rate'))
+        if len(rates) != 1 or moves.currency_id != currency:
+            return 0.0
+        return rates.pop()
+
+    def _create_payment_vals_from_wizard(self, batch_result):
+        """
+        Por qué: Pasar la tasa manual al pago generado (modo un solo pago)
+        """
+        payment_vals = super()._create_payment_vals_from_wizard(batch_result)
+        if self.manual_currency_rate:
+            payment_vals['manual_currency_rate'] = self.manual_currency_rate
+        return payment_vals
+
+    def _create_payment_vals_from_batch(self, batch_result):
+        """
+        Por qué: En pagos masivos cada lote usa la tasa común de sus facturas
+        Tip: Sin recorrer factura por factura, un lote = un pago
+        """
+        payment_vals = super()._create_payment_vals_from_batch(batch_result)
+        manual_rate = self._get_common_manual_rate(
+            batch_result['lines'].move_id,
+            self.env['res.currency'].browse(payment_vals['currency_id'])
+        )
+        if manual_rate:
+            payment_vals['manual_currency_rate'] = manual_rate
+        return payment_vals
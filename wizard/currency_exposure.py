@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class CurrencyExposure(models.TransientModel):
+    _name = 'l10n_ar.currency.exposure'
+    _description = 'Exposición en Moneda Extranjera Consolidada'
+
+    # Por qué: Consolidar varias compañías en una sola consulta
+    company_ids = fields.Many2many(
+        'res.company',
+        string='Compañías',
+        required=True,
+        default=lambda self: self.env.companies
+    )
+    date = fields.Date(
+        string='Fecha de Valuación',
+        required=True,
+        default=fields.Date.context_today
+    )
+    line_ids = fields.One2many(
+        'l10n_ar.currency.exposure.line',
+        'exposure_id',
+        string='Exposición'
+    )
+
+    def action_compute(self):
+        """
+        Por qué: Calcular exposición de todas las compañías de una vez
+        Patrón: Batch Query - un read_group + una consulta de tasas
+        Tip: Cada compañía se valúa en su propia moneda
+        """
+        self.ensure_one()
+        self.line_ids.unlink()
+        self.env['l10n_ar.currency.exposure.line'].create([
+            dict(values, exposure_id=self.id)
+            for values in self._get_exposure_values()
+        ])
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _get_exposure_values(self):
+        """
+        Por qué: Exposición abierta de las compañías seleccionadas
+        Tip: Misma agregación que usa el snapshot materializado
+        """
+        self.ensure_one()
+        return self.env['account.move']._get_currency_exposure_values(
+            [('company_id', 'in', self.company_ids.ids)],
+            self.date
+        )
+
+
+class CurrencyExposureLine(models.TransientModel):
+    _name = 'l10n_ar.currency.exposure.line'
+    _description = 'Línea de Exposición en Moneda Extranjera'
+    _order = 'company_id, currency_id, exposure_type'
+
+    exposure_id = fields.Many2one(
+        'l10n_ar.currency.exposure',
+        required=True,
+        ondelete='cascade'
+    )
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    company_currency_id = fields.Many2one(
+        'res.currency',
+        related='company_id.currency_id',
+        string='Moneda Compañía'
+    )
+    currency_id = fields.Many2one('res.currency', string='Moneda', readonly=True)
+    exposure_type = fields.Selection(
+        [('receivable', 'A Cobrar'), ('payable', 'A Pagar')],
+        string='Tipo',
+        readonly=True
+    )
+    amount_currency = fields.Monetary(
+        string='Residual (Moneda Extranjera)',
+        currency_field='currency_id',
+        readonly=True
+    )
+    amount_booked = fields.Monetary(
+        string='Valor Registrado',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    amount_today = fields.Monetary(
+        string='Valor a Tasa del Día',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    amount_difference = fields.Monetary(
+        string='Diferencia',
+        currency_field='company_currency_id',
+        readonly=True
+    )
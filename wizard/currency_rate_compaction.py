@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class CurrencyRateCompaction(models.TransientModel):
+    _name = 'l10n_ar.currency.rate.compaction'
+    _description = 'Compactación de Historial de Tasas'
+
+    currency_ids = fields.Many2many(
+        'res.currency',
+        string='Monedas',
+        help='Vacío para compactar todas las monedas.'
+    )
+    state = fields.Selection(
+        [('draft', 'Borrador'), ('simulated', 'Simulado'), ('done', 'Compactado')],
+        default='draft',
+        readonly=True
+    )
+    rows_before = fields.Integer(string='Filas Antes', readonly=True)
+    rows_removed = fields.Integer(string='Filas a Eliminar', readonly=True)
+    rows_after = fields.Integer(string='Filas Después', readonly=True)
+    lookup_count = fields.Integer(string='Búsquedas Verificadas', readonly=True)
+    lookup_before_ms = fields.Float(string='Búsqueda Antes (ms)', digits=(16, 1), readonly=True)
+    lookup_after_ms = fields.Float(string='Búsqueda Después (ms)', digits=(16, 1), readonly=True)
+
+    def action_dry_run(self):
+        """
+        Por qué: Ver cuántas filas se eliminan y el impacto sin tocar datos
+        Tip: Se ejecuta en un savepoint que luego se revierte
+        """
+        return self._run_compaction(dry_run=True)
+
+    def action_compact(self):
+        """
+        Por qué: Eliminar tasas repetidas conservando solo puntos de cambio
+        """
+        return self._run_compaction(dry_run=False)
+
+    def _run_compaction(self, dry_run):
+        self.ensure_one()
+        result = self.env['res.currency.rate'].sudo()._compact_rate_history(
+            currency_ids=self.currency_ids.ids,
+            dry_run=dry_run,
+        )
+        result.pop('dry_run')
+        self.write(dict(result, state='simulated' if dry_run else 'done'))
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+import heapq
+from collections import defaultdict
+
+from odoo import models, fields
+
+from ..models.account_move import RESIDUAL_SIGN
+
+# Por qué: Documentos abiertos alcanzados por una nueva tasa manual
+# Tip: {tipo: (modelo, dominio de documentos abiertos)}
+SIMULATION_SOURCES = {
+    'sale': ('sale.order', [('state', 'in', ('draft', 'sent'))]),
+    'purchase': ('purchase.order', [('state', 'in', ('draft', 'sent', 'to approve'))]),
+    'invoice': ('account.move', [('state', '=', 'draft'), ('move_type', 'in', list(RESIDUAL_SIGN))]),
+}
+
+DOCUMENT_TYPES = [
+    ('sale', 'Presupuestos'),
+    ('purchase', 'Solicitudes de Compra'),
+    ('invoice', 'Facturas en Borrador'),
+]
+
+
+class CurrencyRateSimulation(models.TransientModel):
+    _name = 'l10n_ar.currency.rate.simulation'
+    _description = 'Simulación de Tasa de Cambio'
+
+    company_ids = fields.Many2many(
+        'res.company',
+        string='Compañías',
+        required=True,
+        default=lambda self: self.env.companies
+    )
+    currency_id = fields.Many2one('res.currency', string='Moneda', required=True)
+    simulated_rate = fields.Float(
+        string='Tasa Simulada',
+        digits=(12, 6),
+        required=True,
+        help='Tasa hipotética (moneda compañía por unidad de moneda extranjera). '
+             'No se guarda en ningún documento.'
+    )
+    include_sale = fields.Boolean(string='Presupuestos', default=True)
+    include_purchase = fields.Boolean(string='Solicitudes de Compra', default=True)
+    include_invoice = fields.Boolean(string='Facturas en Borrador', default=True)
+    detail_limit = fields.Integer(
+        string='Documentos en Detalle',
+        default=50,
+        help='Cantidad de documentos con mayor impacto a mostrar en el detalle.'
+    )
+    summary_line_ids = fields.One2many(
+        'l10n_ar.currency.rate.simulation.line',
+        'simulation_id',
+        string='Resumen',
+        domain=[('line_type', '=', 'summary')]
+    )
+    detail_line_ids = fields.One2many(
+        'l10n_ar.currency.rate.simulation.line',
+        'simulation_id',
+        string='Detalle',
+        domain=[('line_type', '=', 'detail')]
+    )
+
+    def action_simulate(self):
+        """
+        Por qué: Ver el impacto de una tasa antes de aplicarla
+        Patrón: What-If Analysis - resultado en líneas transitorias
+        Tip: Solo se escriben las líneas del wizard, nunca los documentos
+        """
+        self.ensure_one()
+        (self.summary_line_ids | self.detail_line_ids).unlink()
+        self.env['l10n_ar.currency.rate.simulation.line'].create([
+            dict(values, simulation_id=self.id)
+            for values in self._get_simulation_values()
+        ])
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _get_simulation_document_types(self):
+        self.ensure_one()
+        return [
+            doc_type for doc_type, include in (
+                ('sale', self.include_sale),
+                ('purchase', self.include_purchase),
+                ('invoice', self.include_invoice),
+            ) if include
+        ]
+
+    def _get_simulation_values(self):
+        """
+        Por qué: Simular miles de documentos en segundos
+        Patrón: Columnar Pass - una lectura en lote por modelo y un solo
+                recorrido aritmético sobre los montos
+        Tip: El valor actual usa la tasa efectiva almacenada de cada documento;
+             el margen se simula solo si el modelo lo tiene (sale_margin).
+             Las facturas llevan el signo de RESIDUAL_SIGN
+        """
+        self.ensure_one()
+        new_rate = self.simulated_rate
+        companies = self.company_ids.filtered(lambda company: company.currency_id != self.currency_id)
+
+        summaries = defaultdict(lambda: defaultdict(float))
+        candidates = []
+        for doc_type in self._get_simulation_document_types():
+            model_name, domain = SIMULATION_SOURCES[doc_type]
+            Model = self.env[model_name]
+            has_margin = 'margin' in Model._fields
+            is_invoice = doc_type == 'invoice'
+            field_names = ['company_id', 'amount_untaxed', 'amount_total', 'effective_currency_rate']
+            if has_margin:
+                field_names.append('margin')
+            if is_invoice:
+                field_names.append('move_type')
+            records = Model.search_fetch(domain + [
+                ('currency_id', '=', self.currency_id.id),
+                ('company_id', 'in', companies.ids),
+            ], field_names)
+
+            for record in records:
+                rate = record.effective_currency_rate
+                # Por qué: Facturas de cliente suman, de proveedor y notas de
+                # crédito restan (mismo criterio que la exposición)
+                amount_total = record.amount_total * (RESIDUAL_SIGN[record.move_type] if is_invoice else 1)
+                current = amount_total * rate
+                delta = amount_total * new_rate - current
+
+                summary = summaries[(doc_type, record.company_id.id)]
+                summary['document_count'] += 1
+                summary['amount_currency'] += amount_total
+                summary['amount_current'] += current
+                summary['amount_delta'] += delta
+                if has_margin:
+                    # Por qué: El costo ya está en moneda compañía, solo
+                    # cambia el valor de la venta
+                    margin_current = record.margin * rate
+                    summary['margin_current'] += margin_current
+                    summary['margin_simulated'] += margin_current + record.amount_untaxed * (new_rate - rate)
+                candidates.append((abs(delta), model_name, record.id, doc_type, amount_total, current, delta))
+
+        values = []
+        for (doc_type, company_id), summary in summaries.items():
+            values.append(self._prepare_simulation_line(
+                'summary', doc_type, company_id,
+                summary['amount_currency'], summary['amount_current'], summary['amount_delta'],
+                document_count=int(summary['document_count']),
+                margin_current=summary['margin_current'],
+                margin_simulated=summary['margin_simulated'],
+            ))
+
+        # Por qué: Detalle solo de los documentos con mayor impacto
+        top = heapq.nlargest(max(self.detail_limit, 0), candidates)
+        ids_by_model = defaultdict(list)
+        for _abs_delta, model_name, record_id, *_rest in top:
+            ids_by_model[model_name].append(record_id)
+        records_by_key = {
+            (model_name, record.id): record
+            for model_name, ids in ids_by_model.items()
+            for record in self.env[model_name].browse(ids)
+        }
+        for _abs_delta, model_name, record_id, doc_type, amount_total, current, delta in top:
+            record = records_by_key[(model_name, record_id)]
+            values.append(self._prepare_simulation_line(
+                'detail', doc_type, record.company_id.id, amount_total, current, delta,
+                res_model=model_name,
+                res_id=record_id,
+                document_name=record.display_name,
+                partner_id=record.partner_id.id,
+                document_count=1,
+            ))
+        return values
+
+    def _prepare_simulation_line(self, line_type, doc_type, company_id, amount_currency,
+                                 amount_current, amount_delta, **extra):
+        """
+        Por qué: Formato único para líneas de resumen y de detalle
+        """
+        company_currency = self.env['res.company'].browse(company_id).currency_id
+        amount_current = company_currency.round(amount_current)
+        amount_delta = company_currency.round(amount_delta)
+        return dict(
+            extra,
+            line_type=line_type,
+            document_type=doc_type,
+            company_id=company_id,
+            currency_id=self.currency_id.id,
+            amount_currency=amount_currency,
+            amount_current=amount_current,
+            amount_simulated=amount_current + amount_delta,
+            amount_delta=amount_delta,
+            delta_percent=amount_delta / amount_current * 100 if amount_current else 0.0,
+        )
+
+
+class CurrencyRateSimulationLine(models.TransientModel):
+    _name = 'l10n_ar.currency.rate.simulation.line'
+    _description = 'Línea de Simulación de Tasa de Cambio'
+    _order = 'line_type desc, company_id, document_type, id'
+
+    simulation_id = fields.Many2one(
+        'l10n_ar.currency.rate.simulation',
+        required=True,
+        ondelete='cascade'
+    )
+    line_type = fields.Selection(
+        [('summary', 'Resumen'), ('detail', 'Detalle')],
+        string='Tipo de Línea',
+        required=True,
+        readonly=True
+    )
+    document_type = fields.Selection(DOCUMENT_TYPES, string='Documentos', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    company_currency_id = fields.Many2one(
+        'res.currency',
+        related='company_id.currency_id',
+        string='Moneda Compañía'
+    )
+    currency_id = fields.Many2one('res.currency', string='Moneda', readonly=True)
+    res_model = fields.Char(string='Modelo', readonly=True)
+    res_id = fields.Many2oneReference(string='Id Documento', model_field='res_model', readonly=True)
+    document_name = fields.Char(string='Documento', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Contacto', readonly=True)
+    document_count = fields.Integer(string='Cantidad', readonly=True)
+    amount_currency = fields.Monetary(
+        string='Total (Moneda Extranjera)',
+        currency_field='currency_id',
+        readonly=True
+    )
+    amount_current = fields.Monetary(
+        string='Total a Tasa Actual',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    amount_simulated = fields.Monetary(
+        string='Total a Tasa Simulada',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    amount_delta = fields.Monetary(
+        string='Diferencia',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    delta_percent = fields.Float(string='Diferencia %', digits=(16, 2), readonly=True)
+    margin_current = fields.Monetary(
+        string='Margen Actual',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+    margin_simulated = fields.Monetary(
+        string='Margen Simulado',
+        currency_field='company_currency_id',
+        readonly=True
+    )
+
+    def action_open_document(self):
+        """
+        Por qué: Abrir el documento del detalle para revisarlo
+        """
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self.res_model,
+            'res_id': self.res_id,
+            'view_mode': 'form',
+        }